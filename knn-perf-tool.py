@@ -18,4 +18,6 @@
 
 import okpt.main
 
-okpt.main.main()
+# guarded, since spawned worker processes import the main module again
+if __name__ == '__main__':
+    okpt.main.main()
@@ -14,10 +14,18 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
-"""Provides the Diff class."""
+"""Provides the Diff class.
+
+NumPy is only imported when raw samples are diffed, so that diffing JSON
+results starts quickly.
+"""
+from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class InvalidTestResultsError(Exception):
@@ -35,6 +43,39 @@ def _is_numeric(a) -> bool:
     return isinstance(a, (int, float))
 
 
+_SAMPLE_PERCENTILES = {'p50': 50, 'p90': 90, 'p99': 99, 'p999': 99.9}
+
+
+def _get_sample_stats(samples: Mapping[str, np.ndarray]) -> Dict[str, float]:
+    """Calculates percentile statistics of raw samples, pooled across runs.
+
+    Only 1D sample arrays (the step measures) are read, the `_ids` arrays are
+    never loaded.
+
+    Args:
+        samples: Mapping of `run_{i}/{sample_label}` to sample arrays.
+
+    Returns:
+        A dict of `samples_{sample_label}_{percentile}` statistics.
+    """
+    import numpy as np
+
+    pooled: Dict[str, List[np.ndarray]] = {}
+    for name in samples:
+        sample_label = name.split('/', 1)[-1]
+        if sample_label.endswith('_ids'):
+            continue
+        pooled.setdefault(sample_label, []).append(samples[name])
+
+    stats = {}
+    for sample_label, arrays in pooled.items():
+        values = np.concatenate(arrays)
+        for stat, percentile in _SAMPLE_PERCENTILES.items():
+            stats[f'samples_{sample_label}_{stat}'] = float(
+                np.percentile(values, percentile))
+    return stats
+
+
 class TestResultFields(str, Enum):
     METADATA = 'metadata'
     RESULTS = 'results'
@@ -58,9 +99,17 @@ class Diff:
                           Any],
         changed_result: Dict[str,
                              Any],
-        metadata: bool
+        metadata: bool,
+        base_samples: Optional[Mapping[str,
+                                       np.ndarray]] = None,
+        changed_samples: Optional[Mapping[str,
+                                          np.ndarray]] = None
     ):
-        """Initializes test results and validate them."""
+        """Initializes test results and validate them.
+
+        If raw samples are given for both results, percentiles of the full
+        sample distributions are diffed as well.
+        """
         self.base_result = base_result
         self.changed_result = changed_result
         self.metadata = metadata
@@ -89,6 +138,24 @@ class Diff:
                 f'key `{key}` in {result} points to a non-numeric value.'
             )
 
+        # make sure both or neither of the results have samples
+        if (base_samples is None) != (changed_samples is None):
+            result = TestResultNames.BASE if base_samples is None else \
+                TestResultNames.CHANGED
+            raise InvalidTestResultsError(f'{result} has no samples.')
+
+        self.base_sample_stats: Dict[str, float] = {}
+        self.changed_sample_stats: Dict[str, float] = {}
+        if base_samples is not None and changed_samples is not None:
+            self.base_sample_stats = _get_sample_stats(base_samples)
+            self.changed_sample_stats = _get_sample_stats(changed_samples)
+            for k in self.base_sample_stats:
+                if not k in self.changed_sample_stats:
+                    raise InvalidTestResultsError(
+                        f'key `{k}` is not present in the samples of '
+                        f'{TestResultNames.CHANGED}.'
+                    )
+
     def _validate_keys(self) -> Tuple[bool, str, str]:
         """Ensure both test results have `metadata` and `results` keys."""
         check_keydict = lambda key, res: key in res and isinstance(
@@ -138,6 +205,10 @@ class Diff:
             key: self.changed_results[key] - self.base_results[key]
             for key in self.base_results
         }
+        results_diff.update({
+            key: self.changed_sample_stats[key] - self.base_sample_stats[key]
+            for key in self.base_sample_stats
+        })
 
         # add metadata if specified
         if self.metadata:
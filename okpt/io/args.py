@@ -16,8 +16,8 @@
 # under the License.
 """Parses and defines command line arguments for the program.
 
-Defines the subcommands `test`, `plot`, and `diff` and the corresponding
-files that are required by each command.
+Defines the subcommands `test`, `plot`, `diff` and `selfbench` and the
+corresponding files that are required by each command.
 
 Functions:
     define_args(): Define the command line arguments.
@@ -28,7 +28,7 @@ import argparse
 import sys
 from dataclasses import dataclass
 from io import TextIOWrapper
-from typing import Union
+from typing import List, Optional, Union
 
 _read_type = argparse.FileType('r')
 _write_type = argparse.FileType('w')
@@ -87,8 +87,27 @@ def _add_metadata(parser, name, **kwargs):
     parser.add_argument(name, **opts)
 
 
+def _add_samples(parser, name, **kwargs):
+    opts = {
+        'action': 'store_true',
+        'help': 'Also diff percentiles of the raw samples files.',
+        **kwargs,
+    }
+    parser.add_argument(name, **opts)
+
+
+def _add_resume(parser, name, **kwargs):
+    opts = {
+        'action': 'store_true',
+        'help': 'Skip the runs already completed in the journal of the output.',
+        **kwargs,
+    }
+    parser.add_argument(name, **opts)
+
+
 def _add_test_cmd(subparsers):
     test_parser = subparsers.add_parser('test')
+    _add_resume(test_parser, '--resume')
     _add_config(test_parser, 'config')
     _add_output(test_parser, 'output')
 
@@ -96,6 +115,7 @@ def _add_test_cmd(subparsers):
 def _add_diff_cmd(subparsers):
     diff_parser = subparsers.add_parser('diff')
     _add_metadata(diff_parser, '--metadata')
+    _add_samples(diff_parser, '--samples')
     _add_result(
         diff_parser,
         'base_result',
@@ -111,10 +131,39 @@ def _add_diff_cmd(subparsers):
     _add_output(diff_parser, '--output', default=sys.stdout)
 
 
+def _add_selfbench_cmd(subparsers):
+    selfbench_parser = subparsers.add_parser('selfbench')
+    selfbench_parser.add_argument(
+        '--num-vectors',
+        type=int,
+        default=10000,
+        help='Number of vectors to index, and to query.')
+    selfbench_parser.add_argument('--dimension',
+                                  type=int,
+                                  default=128,
+                                  help='Dimension of the vectors.')
+    selfbench_parser.add_argument('--bulk-size',
+                                  type=int,
+                                  default=500,
+                                  help='Number of vectors per bulk request.')
+    selfbench_parser.add_argument(
+        '--query-concurrency',
+        type=int,
+        default=8,
+        help='Concurrency of the async and process query drivers.')
+    selfbench_parser.add_argument(
+        '--suite',
+        action='append',
+        choices=['micro', 'mock', 'startup'],
+        help='Suite to run, may be repeated; all suites by default.')
+    _add_output(selfbench_parser, 'output')
+
+
 @dataclass
 class TestArgs:
     log: str
     command: str
+    resume: bool
     config: TextIOWrapper
     output: TextIOWrapper
 
@@ -124,12 +173,25 @@ class DiffArgs:
     log: str
     command: str
     metadata: bool
+    samples: bool
     base_result: TextIOWrapper
     changed_result: TextIOWrapper
     output: TextIOWrapper
 
 
-def get_args() -> Union[TestArgs, DiffArgs]:
+@dataclass
+class SelfbenchArgs:
+    log: str
+    command: str
+    num_vectors: int
+    dimension: int
+    bulk_size: int
+    query_concurrency: int
+    suite: Optional[List[str]]
+    output: TextIOWrapper
+
+
+def get_args() -> Union[TestArgs, DiffArgs, SelfbenchArgs]:
     """Define, parse and return command line args.
 
     Returns:
@@ -166,6 +228,7 @@ def get_args() -> Union[TestArgs, DiffArgs]:
         # add subcommands
         _add_test_cmd(subparsers)
         _add_diff_cmd(subparsers)
+        _add_selfbench_cmd(subparsers)
 
     define_args()
     args = parser.parse_args()
@@ -173,14 +236,27 @@ def get_args() -> Union[TestArgs, DiffArgs]:
         return TestArgs(
             log=args.log,
             command=args.command,
+            resume=args.resume,
             config=args.config,
             output=args.output
         )
+    elif args.command == 'selfbench':
+        return SelfbenchArgs(
+            log=args.log,
+            command=args.command,
+            num_vectors=args.num_vectors,
+            dimension=args.dimension,
+            bulk_size=args.bulk_size,
+            query_concurrency=args.query_concurrency,
+            suite=args.suite,
+            output=args.output
+        )
     else:
         return DiffArgs(
             log=args.log,
             command=args.command,
             metadata=args.metadata,
+            samples=args.samples,
             base_result=args.base_result,
             changed_result=args.changed_result,
             output=args.output
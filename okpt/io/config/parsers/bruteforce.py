@@ -0,0 +1,56 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides BruteforceParser.
+
+Classes:
+    BruteforceParser: Brute force config parser.
+"""
+from dataclasses import dataclass
+from io import TextIOWrapper
+
+from okpt.io.config.parsers import base
+
+
+@dataclass
+class BruteforceConfig:
+    space_type: str
+    tile_size: int
+    thread_qty: int
+    query_batch_size: int
+    k: int
+
+
+class BruteforceParser(base.BaseParser):
+    """Parser for brute force config.
+
+    Methods:
+        parse: Parse and validate the brute force config.
+    """
+
+    def __init__(self):
+        super().__init__('bruteforce')
+
+    def parse(self, file_obj: TextIOWrapper) -> BruteforceConfig:
+        """See base class."""
+        config = super().parse(file_obj)
+        return BruteforceConfig(
+            space_type=config['space_type'],
+            tile_size=config['tile_size'],
+            thread_qty=config['thread_qty'],
+            query_batch_size=config['query_batch_size'],
+            k=config['k'],
+        )
@@ -0,0 +1,105 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides FaissParser.
+
+Classes:
+    FaissParser: Faiss config parser.
+"""
+from dataclasses import dataclass
+from io import TextIOWrapper
+
+from okpt.io.config.parsers import base
+
+
+@dataclass
+class EncoderParametersConfig:
+    m: int
+    code_size: int
+
+
+@dataclass
+class EncoderConfig:
+    name: str
+    parameters: EncoderParametersConfig
+
+
+@dataclass
+class MethodParametersConfig:
+    ef_construction: int
+    ef_search: int
+    m: int
+    nlist: int
+    nprobes: int
+    encoder: EncoderConfig
+
+
+@dataclass
+class MethodConfig:
+    name: str
+    space_type: str  # not in `parameters` to match OpenSearch config
+    parameters: MethodParametersConfig
+
+
+@dataclass
+class FaissConfig:
+    method: MethodConfig
+    index_thread_qty: int
+    query_thread_qty: int
+    query_batch_size: int
+    k: int
+
+
+class FaissParser(base.BaseParser):
+    """Parser for Faiss config.
+
+    Methods:
+        parse: Parse and validate the Faiss config.
+    """
+
+    def __init__(self):
+        super().__init__('faiss')
+
+    def parse(self, file_obj: TextIOWrapper) -> FaissConfig:
+        """See base class."""
+        config = super().parse(file_obj)
+        method_config = config['method']
+        parameters_config = method_config['parameters']
+        encoder_config = parameters_config['encoder']
+        faiss_config = FaissConfig(
+            method=MethodConfig(
+                name=method_config['name'],
+                space_type=method_config['space_type'],
+                parameters=MethodParametersConfig(
+                    ef_construction=parameters_config['ef_construction'],
+                    ef_search=parameters_config['ef_search'],
+                    m=parameters_config['m'],
+                    nlist=parameters_config['nlist'],
+                    nprobes=parameters_config['nprobes'],
+                    encoder=EncoderConfig(
+                        name=encoder_config['name'],
+                        parameters=EncoderParametersConfig(
+                            m=encoder_config['parameters']['m'],
+                            code_size=encoder_config['parameters']
+                            ['code_size'],
+                        )),
+                )),
+            index_thread_qty=config['index_thread_qty'],
+            query_thread_qty=config['query_thread_qty'],
+            query_batch_size=config['query_batch_size'],
+            k=config['k'],
+        )
+        return faiss_config
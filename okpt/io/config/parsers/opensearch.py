@@ -21,20 +21,125 @@ Classes:
 """
 from dataclasses import dataclass
 from io import TextIOWrapper
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from okpt.io.config.parsers import base
 from okpt.io.utils import reader
 
 
+@dataclass
+class EndpointConfig:
+    host: str
+    port: int
+
+
+@dataclass
+class AutotuneConfig:
+    bulk_sizes: List[int]
+    workers: List[int]
+    sample_size: int
+    max_rejection_rate: float
+
+
+@dataclass
+class IngestOptimizedConfig:
+    translog_flush_threshold_size: str
+    recovery_timeout: int
+
+
+@dataclass
+class FilterConfig:
+    selectivities: List[float]
+    template: str
+    seed: int
+
+
+@dataclass
+class QuerySamplingConfig:
+    mode: str
+    num_queries: int
+    duration: float
+    replacement: bool
+    seed: int
+
+
+@dataclass
+class QueryProfileConfig:
+    fraction: float
+    seed: int
+
+
+@dataclass
+class GrowthConfig:
+    increments: int
+    num_queries: int
+    seed: int
+
+
+@dataclass
+class ChurnConfig:
+    operation: str
+    fraction: float
+    seed: int
+
+
+@dataclass
+class QuantizationConfig:
+    type: str
+    scale: Optional[float]
+
+
+@dataclass
+class TrainConfig:
+    model_spec: Optional[Dict[str, Any]]
+    model_id: str
+    num_vectors: int
+    seed: int
+    poll_interval: float
+    timeout: float
+
+
 @dataclass
 class OpenSearchConfig:
-    endpoint: str
+    endpoints: List[EndpointConfig]
+    host_selection: str
+    pool_maxsize: int
+    keep_alive: bool
     index_spec: Dict[str, Any]
     max_num_segments: int
     index_thread_qty: int
     bulk_size: int
+    bulk_workers: int
+    autotune: Optional[AutotuneConfig]
+    ingest_optimized: Optional[IngestOptimizedConfig]
     k: int
+    query_driver: str
+    query_concurrency: int
+    ingest_rate: int
+    ingest_refresh_interval: str
+    score_recall: bool
+    msearch_size: int
+    query_sampling: QuerySamplingConfig
+    query_profile: QueryProfileConfig
+    filter: FilterConfig
+    growth: GrowthConfig
+    churn: ChurnConfig
+    quantization: QuantizationConfig
+    train: TrainConfig
+
+
+def _parse_endpoints(config_obj: Dict[str, Any]) -> List[EndpointConfig]:
+    if 'endpoints' in config_obj:
+        return [
+            EndpointConfig(host=endpoint['host'], port=endpoint['port'])
+            for endpoint in config_obj['endpoints']
+        ]
+
+    # TODO: fix for security in the future
+    # assume that port is 80 unless localhost is set
+    endpoint = config_obj['endpoint']
+    port = 9200 if endpoint == 'localhost' else 80
+    return [EndpointConfig(host=endpoint, port=port)]
 
 
 class OpenSearchParser(base.BaseParser):
@@ -49,13 +154,78 @@ class OpenSearchParser(base.BaseParser):
     def parse(self, file_obj: TextIOWrapper) -> OpenSearchConfig:
         """See base class."""
         config_obj = super().parse(file_obj)
+        if config_obj['msearch_size'] > 1 and \
+                config_obj['query_driver'] != 'sync':
+            raise base.ConfigurationError(
+                'msearch_size is only supported by the sync query driver.')
         index_spec_path = config_obj['index_spec']
         index_spec_obj = reader.parse_json_from_path(index_spec_path)
+        train_obj = config_obj['train']
+        autotune_obj = config_obj['autotune']
+        autotune = None
+        if autotune_obj is not None:
+            autotune = AutotuneConfig(
+                bulk_sizes=sorted(set(autotune_obj['bulk_sizes'])),
+                workers=sorted(set(autotune_obj['workers'])),
+                sample_size=autotune_obj['sample_size'],
+                max_rejection_rate=autotune_obj['max_rejection_rate'])
+        ingest_optimized_obj = config_obj['ingest_optimized']
+        ingest_optimized = None
+        if ingest_optimized_obj is not None:
+            ingest_optimized = IngestOptimizedConfig(
+                translog_flush_threshold_size=ingest_optimized_obj[
+                    'translog_flush_threshold_size'],
+                recovery_timeout=ingest_optimized_obj['recovery_timeout'])
+        model_spec_obj = None
+        if train_obj['model_spec'] is not None:
+            model_spec_obj = reader.parse_json_from_path(
+                train_obj['model_spec'])
         opensearch_config = OpenSearchConfig(
-            endpoint=config_obj['endpoint'],
+            endpoints=_parse_endpoints(config_obj),
+            host_selection=config_obj['host_selection'],
+            pool_maxsize=config_obj['pool_maxsize'],
+            keep_alive=config_obj['keep_alive'],
             index_spec=index_spec_obj,
             max_num_segments=config_obj['max_num_segments'],
             index_thread_qty=config_obj['index_thread_qty'],
             bulk_size=config_obj['bulk_size'],
-            k=config_obj['k'])
+            bulk_workers=config_obj['bulk_workers'],
+            autotune=autotune,
+            ingest_optimized=ingest_optimized,
+            k=config_obj['k'],
+            query_driver=config_obj['query_driver'],
+            query_concurrency=config_obj['query_concurrency'],
+            ingest_rate=config_obj['ingest_rate'],
+            ingest_refresh_interval=config_obj['ingest_refresh_interval'],
+            score_recall=config_obj['score_recall'],
+            msearch_size=config_obj['msearch_size'],
+            query_sampling=QuerySamplingConfig(
+                mode=config_obj['query_sampling']['mode'],
+                num_queries=config_obj['query_sampling']['num_queries'],
+                duration=config_obj['query_sampling']['duration'],
+                replacement=config_obj['query_sampling']['replacement'],
+                seed=config_obj['query_sampling']['seed']),
+            query_profile=QueryProfileConfig(
+                fraction=config_obj['query_profile']['fraction'],
+                seed=config_obj['query_profile']['seed']),
+            filter=FilterConfig(
+                selectivities=config_obj['filter']['selectivities'],
+                template=config_obj['filter']['template'],
+                seed=config_obj['filter']['seed']),
+            growth=GrowthConfig(
+                increments=config_obj['growth']['increments'],
+                num_queries=config_obj['growth']['num_queries'],
+                seed=config_obj['growth']['seed']),
+            churn=ChurnConfig(operation=config_obj['churn']['operation'],
+                              fraction=config_obj['churn']['fraction'],
+                              seed=config_obj['churn']['seed']),
+            quantization=QuantizationConfig(
+                type=config_obj['quantization']['type'],
+                scale=config_obj['quantization']['scale']),
+            train=TrainConfig(model_spec=model_spec_obj,
+                              model_id=train_obj['model_id'],
+                              num_vectors=train_obj['num_vectors'],
+                              seed=train_obj['seed'],
+                              poll_interval=train_obj['poll_interval'],
+                              timeout=train_obj['timeout']))
         return opensearch_config
@@ -19,22 +19,66 @@
 Classes:
     ToolParser: Tool config parser.
 """
+import os
 from dataclasses import dataclass
 from io import TextIOWrapper
-from typing import Union, cast
+from typing import Dict, List, Optional, Union, cast
 
 import h5py
 
 from okpt.io.config.parsers import base, utils
+from okpt.io.config.parsers.bruteforce import BruteforceConfig
+from okpt.io.config.parsers.faiss import FaissConfig
 from okpt.io.config.parsers.nmslib import NmslibConfig
 from okpt.io.config.parsers.opensearch import OpenSearchConfig
 from okpt.io.utils import reader
 
 
+@dataclass
+class AdaptiveConfig:
+    min_runs: int
+    ci_width: float
+    confidence: float
+    metrics: List[str]
+
+
+@dataclass
+class TraceConfig:
+    capacity: int
+    sample_rates: Dict[str, float]
+
+
+@dataclass
+class ProfilerConfig:
+    mode: str
+    targets: List[str]
+    interval: float
+
+
+@dataclass
+class ScalingConfig:
+    fractions: List[float]
+    metrics: List[str]
+    predict_factors: List[float]
+
+
+@dataclass
+class ThreadScalingConfig:
+    thread_counts: List[int]
+    parameters: List[str]
+    metrics: List[str]
+
+
 @dataclass
 class TestParameters:
     num_runs: int
     show_runs: bool
+    save_samples: bool
+    adaptive: Optional[AdaptiveConfig]
+    trace: Optional[TraceConfig]
+    profiler: Optional[ProfilerConfig]
+    scaling: Optional[ScalingConfig]
+    thread_scaling: Optional[ThreadScalingConfig]
 
 
 @dataclass
@@ -48,8 +92,10 @@ class ToolConfig:
     test_name: str
     test_id: str
     knn_service: str
-    service_config: Union[OpenSearchConfig, NmslibConfig]
+    service_config: Union[OpenSearchConfig, NmslibConfig, FaissConfig,
+                          BruteforceConfig]
     dataset: Dataset
+    dataset_path: str
     dataset_format: str
     test_parameters: TestParameters
 
@@ -84,6 +130,62 @@ class ToolParser(base.BaseParser):
         service_config_file_obj = reader.get_file_obj(service_config_path)
         config_parser = utils.get_parser(knn_service_name)
 
+        adaptive_obj = config_obj['test_parameters']['adaptive']
+        adaptive = None
+        if adaptive_obj is not None:
+            adaptive = AdaptiveConfig(min_runs=adaptive_obj['min_runs'],
+                                      ci_width=adaptive_obj['ci_width'],
+                                      confidence=adaptive_obj['confidence'],
+                                      metrics=adaptive_obj['metrics'])
+            if adaptive.min_runs > config_obj['test_parameters']['num_runs']:
+                raise base.ConfigurationError(
+                    'adaptive.min_runs must not exceed num_runs.')
+
+        trace_obj = config_obj['test_parameters']['trace']
+        trace = None
+        if trace_obj is not None:
+            trace = TraceConfig(capacity=trace_obj['capacity'],
+                                sample_rates=trace_obj['sample_rates'])
+
+        profiler_obj = config_obj['test_parameters']['profiler']
+        profiler = None
+        if profiler_obj is not None:
+            profiler = ProfilerConfig(mode=profiler_obj['mode'],
+                                      targets=profiler_obj['targets'],
+                                      interval=profiler_obj['interval'])
+
+        scaling_obj = config_obj['test_parameters']['scaling']
+        scaling = None
+        if scaling_obj is not None:
+            scaling = ScalingConfig(
+                fractions=sorted(set(scaling_obj['fractions'])),
+                metrics=scaling_obj['metrics'],
+                predict_factors=scaling_obj['predict_factors'])
+            if scaling.fractions[0] <= 0:
+                raise base.ConfigurationError(
+                    'scaling.fractions must be greater than 0.')
+
+        thread_scaling_obj = config_obj['test_parameters']['thread_scaling']
+        thread_scaling = None
+        if thread_scaling_obj is not None:
+            thread_counts = thread_scaling_obj['thread_counts']
+            if thread_counts is None and knn_service_name == 'opensearch':
+                # the cores of the client say nothing about the cluster nodes
+                raise base.ConfigurationError(
+                    'thread_scaling.thread_counts must be set for opensearch.')
+            if thread_counts is None:
+                num_cores = os.cpu_count() or 1
+                thread_counts = [
+                    2**i for i in range(num_cores.bit_length())
+                ] + [num_cores]
+            thread_scaling = ThreadScalingConfig(
+                thread_counts=sorted(set(thread_counts)),
+                parameters=thread_scaling_obj['parameters'],
+                metrics=thread_scaling_obj['metrics'])
+            if scaling is not None:
+                raise base.ConfigurationError(
+                    'scaling and thread_scaling cannot be combined.')
+
         dataset = _parse_dataset(config_obj['dataset'],
                                  config_obj['dataset_format'])
         tool_config = ToolConfig(
@@ -92,8 +194,15 @@ class ToolParser(base.BaseParser):
             knn_service=config_obj['knn_service'],
             service_config=config_parser.parse(service_config_file_obj),
             dataset=dataset,
+            dataset_path=config_obj['dataset'],
             dataset_format=config_obj['dataset_format'],
             test_parameters=TestParameters(
                 config_obj['test_parameters']['num_runs'],
-                config_obj['test_parameters']['show_runs']))
+                config_obj['test_parameters']['show_runs'],
+                config_obj['test_parameters']['save_samples'],
+                adaptive,
+                trace,
+                profiler,
+                scaling,
+                thread_scaling))
         return tool_config
@@ -19,7 +19,8 @@
 Functions:
     get_parser(): Return the intended parser.
 """
-from okpt.io.config.parsers import base, nmslib, opensearch, tool
+from okpt.io.config.parsers import (base, bruteforce, faiss, nmslib,
+                                    opensearch, tool)
 
 
 def get_parser(parser_name: str) -> base.BaseParser:
@@ -37,5 +38,9 @@ def get_parser(parser_name: str) -> base.BaseParser:
         return opensearch.OpenSearchParser()
     if parser_name == 'nmslib':
         return nmslib.NmslibParser()
+    if parser_name == 'faiss':
+        return faiss.FaissParser()
+    if parser_name == 'bruteforce':
+        return bruteforce.BruteforceParser()
 
     raise Exception(f'Invalid parser `{parser_name}`.')
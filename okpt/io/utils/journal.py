@@ -0,0 +1,141 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides functions for journaling completed test runs.
+
+A journal is a directory holding an append-only `runs.jsonl` file and one
+`.npz` samples file per run. The first line of `runs.jsonl` is a header
+describing the test; every following line is one completed run. A run is only
+considered complete once its line is fully written, so a run interrupted while
+being journaled is simply run again on resume.
+
+Functions:
+    get_journal_path(): Get the journal path for a result file path.
+    create_journal(): Create an empty journal.
+    append_run(): Durably append a completed run to a journal.
+    read_journal(): Read the header and completed runs of a journal.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_RUNS_FILE = 'runs.jsonl'
+
+
+def _write_line(file, data: Dict[str, Any]):
+    """Writes a JSON line and flushes it to disk."""
+    file.write(json.dumps(data) + '\n')
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def get_journal_path(result_path: str) -> str:
+    """Get the path of the journal that accompanies a result file.
+
+    Args:
+        result_path: Path of the JSON result file.
+
+    Returns:
+        Path of the journal directory, e.g. `out.json` -> `out.journal`.
+    """
+    return f'{os.path.splitext(result_path)[0]}.journal'
+
+
+def create_journal(path: str, header: Dict[str, Any]):
+    """Creates an empty journal, replacing any existing one.
+
+    Args:
+        path: Path of the journal directory.
+        header: Description of the journaled test.
+    """
+    os.makedirs(path, exist_ok=True)
+    for file_name in os.listdir(path):
+        if file_name.endswith('.npz'):
+            os.remove(os.path.join(path, file_name))
+    with open(os.path.join(path, _RUNS_FILE), 'w') as file:
+        _write_line(file, {'header': header})
+
+
+def append_run(path: str,
+               run_index: int,
+               result: Dict[str, Any],
+               samples: Optional[Dict[str, np.ndarray]] = None):
+    """Durably appends a completed test run to a journal.
+
+    The samples are written first, so a journaled run always has its samples.
+
+    Args:
+        path: Path of the journal directory.
+        run_index: Index of the test run.
+        result: Aggregated result of the test run.
+        samples: Raw samples of the test run, if they are kept.
+    """
+    entry: Dict[str, Any] = {'run': run_index, 'result': result}
+    if samples is not None:
+        samples_file = f'run_{run_index}.npz'
+        tmp_path = os.path.join(path, f'run_{run_index}.tmp.npz')
+        np.savez_compressed(tmp_path, **samples)
+        os.replace(tmp_path, os.path.join(path, samples_file))
+        entry['samples'] = samples_file
+
+    with open(os.path.join(path, _RUNS_FILE), 'a') as file:
+        _write_line(file, entry)
+
+
+def read_journal(
+    path: str
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, np.ndarray]]]:
+    """Reads the header and completed runs of a journal, to resume from it.
+
+    A truncated last line, left by a crash while journaling, is cut off the
+    journal, so that the next run is appended on a line of its own.
+
+    Args:
+        path: Path of the journal directory.
+
+    Returns:
+        The journal header, the results of the completed runs and their
+        samples (empty if samples were not kept).
+    """
+    runs_path = os.path.join(path, _RUNS_FILE)
+    with open(runs_path, 'rb') as file:
+        content = file.read()
+
+    # only lines ending with a newline were fully written
+    lines = content.split(b'\n')[:-1]
+    header = json.loads(lines[0])['header']
+    runs, run_samples = [], []
+    size = len(lines[0]) + 1
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        runs.append(entry['result'])
+        if 'samples' in entry:
+            with np.load(os.path.join(path, entry['samples'])) as samples:
+                run_samples.append(dict(samples))
+        size += len(line) + 1
+
+    if size < len(content):
+        with open(runs_path, 'r+b') as file:
+            file.truncate(size)
+            file.flush()
+            os.fsync(file.fileno())
+    return header, runs, run_samples
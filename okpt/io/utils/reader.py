@@ -22,13 +22,20 @@ Functions:
     parse_yaml_from_path(): Parse YAML file from file path.
     parse_json(): Parse JSON file from file object.
     parse_json_from_path(): Parse JSON file from file path.
+    parse_samples(): Lazily load the samples file referenced by a result.
+
+NumPy and PyYAML are only imported by the functions that need them, so that
+commands reading JSON results start quickly.
 """
+from __future__ import annotations
 
 import json
+import os
 from io import TextIOWrapper
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-import yaml
+if TYPE_CHECKING:
+    import numpy as np
 
 from okpt.io.utils import reader
 
@@ -54,6 +61,8 @@ def parse_yaml(file: TextIOWrapper) -> Dict[str, Any]:
     Returns:
         A dict representing the YAML file.
     """
+    import yaml
+
     return yaml.load(file, Loader=yaml.SafeLoader)
 
 
@@ -93,3 +102,25 @@ def parse_json_from_path(path: str) -> Dict[str, Any]:
     """
     file = reader.get_file_obj(path)
     return json.load(file)
+
+
+def parse_samples(result: Dict[str, Any],
+                  file: TextIOWrapper) -> Optional[np.lib.npyio.NpzFile]:
+    """Lazily loads the samples file referenced by a test result.
+
+    The samples path is resolved relative to the result file. Arrays are only
+    read from disk when they are accessed.
+
+    Args:
+        result: A parsed test result.
+        file: file object the test result was parsed from
+
+    Returns:
+        A mapping of sample arrays, or None if the result has no samples.
+    """
+    if 'samples' not in result:
+        return None
+    import numpy as np
+
+    samples_path = os.path.join(os.path.dirname(file.name), result['samples'])
+    return np.load(samples_path)
@@ -19,11 +19,23 @@
 Functions:
     get_file_obj(): Get a writeable file object.
     write_json(): Writes a python dictionary to a JSON file
+    get_samples_path(): Get the samples file path for a result file path.
+    write_samples(): Writes raw test run samples to a compressed NumPy file.
+    get_trace_path(): Get the trace file path for a result file path.
+    get_profile_path(): Get the profile file path for a result file path.
+
+NumPy is only imported when samples are written, so that commands writing
+JSON start quickly.
 """
+from __future__ import annotations
 
 import json
+import os
 from io import TextIOWrapper
-from typing import Any, Dict, TextIO, Union
+from typing import TYPE_CHECKING, Any, Dict, List, TextIO, Union
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 def get_file_obj(path: str) -> TextIOWrapper:
@@ -49,3 +61,59 @@ def write_json(data: Dict[str, Any],
     """
     indent = 2 if pretty else 0
     json.dump(data, file, indent=indent)
+
+
+def get_samples_path(result_path: str) -> str:
+    """Get the path of the samples file that accompanies a result file.
+
+    Args:
+        result_path: Path of the JSON result file.
+
+    Returns:
+        Path of the samples file, e.g. `out.json` -> `out.samples.npz`.
+    """
+    return f'{os.path.splitext(result_path)[0]}.samples.npz'
+
+
+def write_samples(run_samples: List[Dict[str, np.ndarray]], path: str):
+    """Writes raw test run samples to a compressed NumPy (`.npz`) file.
+
+    Each array is stored under `run_{i}/{sample_label}`, so single arrays can
+    be loaded without reading the whole file.
+
+    Args:
+        run_samples: A list with a dict of sample arrays for each test run.
+        path: Path of output file.
+    """
+    import numpy as np
+
+    arrays = {}
+    for i, samples in enumerate(run_samples):
+        for key, value in samples.items():
+            arrays[f'run_{i}/{key}'] = value
+    np.savez_compressed(path, **arrays)
+
+
+def get_trace_path(result_path: str) -> str:
+    """Get the path of the trace file that accompanies a result file.
+
+    Args:
+        result_path: Path of the JSON result file.
+
+    Returns:
+        Path of the trace file, e.g. `out.json` -> `out.trace.json`.
+    """
+    return f'{os.path.splitext(result_path)[0]}.trace.json'
+
+
+def get_profile_path(result_path: str) -> str:
+    """Get the path, without extension, of the profile that accompanies a
+    result file.
+
+    Args:
+        result_path: Path of the JSON result file.
+
+    Returns:
+        Path of the profile, e.g. `out.json` -> `out.profile`.
+    """
+    return f'{os.path.splitext(result_path)[0]}.profile'
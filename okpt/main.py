@@ -14,17 +14,21 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
-""" Runner script that serves as the main controller of the testing tool."""
+""" Runner script that serves as the main controller of the testing tool.
+
+Modules that load heavy libraries, like the test runner and its backends, are
+only imported by the commands that use them, so that the other commands start
+quickly.
+"""
 
 import logging
+import os
 import sys
 from typing import cast
 
 from okpt.diff import diff
 from okpt.io import args
-from okpt.io.config.parsers import tool
 from okpt.io.utils import reader, writer
-from okpt.test import runner
 
 
 def main():
@@ -37,15 +41,67 @@ def main():
 
     if cli_args.command == 'test':
         cli_args = cast(args.TestArgs, cli_args)
+        from okpt.io.config.parsers import tool
+        from okpt.io.utils import journal
+        from okpt.test import profiler, runner, trace
 
         # parse configs
         parser = tool.ToolParser()
         tool_config = parser.parse(cli_args.config)
         logging.info('Configs are valid.')
 
-        # run tests
-        test_runner = runner.TestRunner(tool_config=tool_config)
-        test_result = test_runner.execute()
+        # run tests, at each dataset size or thread count in a scaling study
+        if tool_config.test_parameters.scaling is not None:
+            from okpt.test import scaling
+            test_runner = scaling.ScalingRunner(
+                tool_config=tool_config,
+                journal_path=journal.get_journal_path(output.name),
+                resume=cli_args.resume)
+        elif tool_config.test_parameters.thread_scaling is not None:
+            from okpt.test import scaling
+            test_runner = scaling.ThreadScalingRunner(
+                tool_config=tool_config,
+                journal_path=journal.get_journal_path(output.name),
+                resume=cli_args.resume)
+        else:
+            test_runner = runner.TestRunner(
+                tool_config=tool_config,
+                journal_path=journal.get_journal_path(output.name),
+                resume=cli_args.resume)
+        # trace and profile the whole test, across every point of a study
+        trace_config = tool_config.test_parameters.trace
+        if trace_config is not None:
+            trace.tracer.start(trace_config.capacity,
+                               trace_config.sample_rates)
+        profiler_config = tool_config.test_parameters.profiler
+        if profiler_config is not None:
+            profiler.profiler.start(profiler_config.targets,
+                                    profiler_config.mode,
+                                    profiler_config.interval)
+        try:
+            test_result = test_runner.execute()
+        finally:
+            trace.tracer.stop()
+            profiler.profiler.stop()
+
+        # write raw samples next to the test results
+        if tool_config.test_parameters.save_samples:
+            samples_path = writer.get_samples_path(output.name)
+            writer.write_samples(test_runner.run_samples, samples_path)
+            test_result['samples'] = os.path.basename(samples_path)
+
+        # write the step timeline next to the test results
+        if tool_config.test_parameters.trace is not None:
+            trace_path = writer.get_trace_path(output.name)
+            trace.tracer.write(trace_path)
+            test_result['trace'] = os.path.basename(trace_path)
+
+        # write the client-side profile next to the test results
+        if tool_config.test_parameters.profiler is not None:
+            profile_path = profiler.profiler.write(
+                writer.get_profile_path(output.name))
+            if profile_path is not None:
+                test_result['profile'] = os.path.basename(profile_path)
 
         # write test results
         logging.debug(
@@ -59,9 +115,29 @@ def main():
         base_result = reader.parse_json(cli_args.base_result)
         changed_result = reader.parse_json(cli_args.changed_result)
 
+        # lazily load raw samples if specified
+        base_samples, changed_samples = None, None
+        if cli_args.samples:
+            base_samples = reader.parse_samples(base_result,
+                                                cli_args.base_result)
+            changed_samples = reader.parse_samples(changed_result,
+                                                   cli_args.changed_result)
+
         # get diff
-        diff_result = diff.Diff(base_result, changed_result,
-                                cli_args.metadata).diff()
+        diff_result = diff.Diff(base_result, changed_result, cli_args.metadata,
+                                base_samples, changed_samples).diff()
         writer.write_json(data=diff_result, file=output, pretty=True)
+    elif cli_args.command == 'selfbench':
+        cli_args = cast(args.SelfbenchArgs, cli_args)
+        from okpt.selfbench import bench
+
+        # benchmark okpt itself against a mock OpenSearch server
+        selfbench_result = bench.run(
+            num_vectors=cli_args.num_vectors,
+            dimension=cli_args.dimension,
+            bulk_size=cli_args.bulk_size,
+            query_concurrency=cli_args.query_concurrency,
+            suites=cli_args.suite)
+        writer.write_json(data=selfbench_result, file=output, pretty=True)
     elif cli_args.command == 'plot':
         pass  # TODO
@@ -0,0 +1,305 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides a self-benchmark of okpt.
+
+The self-benchmark measures how much okpt itself adds to the measures of a
+test, so that it is known when the client is the bottleneck:
+
+- microbenchmarks of the pure-Python hot paths, e.g. `bulk_transform` and the
+  `Step` profiling wrappers, in microseconds per operation;
+- the OpenSearch tests run against `mock.MockOpenSearch`, whose responses
+  take no time, giving the maximum throughput okpt can achieve with each query
+  driver and the overhead per operation;
+- the startup time of the okpt commands, see `startup`.
+
+Functions:
+    run_microbenchmarks(): Benchmark the hot paths of okpt.
+    run_mock_benchmarks(): Benchmark the OpenSearch tests against a mock.
+    run(): Run the whole self-benchmark.
+"""
+import dataclasses
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import h5py
+import numpy as np
+from opensearchpy.serializer import JSONSerializer
+
+from okpt.io.config.parsers import opensearch as opensearch_parser
+from okpt.io.config.parsers import tool
+from okpt.selfbench import mock, startup
+from okpt.test.steps import base as base_s
+from okpt.test.steps import opensearch as opensearch_s
+from okpt.test.tests import base as base_t
+from okpt.test.tests import opensearch as opensearch_t
+
+_MIN_TIME = 0.2
+_NUM_AGGREGATED_STEPS = 10000
+_QUERY_DRIVERS = ['sync', 'async', 'process']
+SUITES = ['micro', 'mock', 'startup']
+
+
+class _NoopStep(base_s.Step):
+    """See base class. Step without an action, to measure profiling."""
+
+    label = 'noop'
+    measures = ['took', 'latency']
+
+
+def _get_seconds_per_call(func: Callable[[], Any],
+                          min_time: float = _MIN_TIME) -> float:
+    """Times a function, calling it until at least `min_time` has passed.
+
+    Args:
+        func: Function to time.
+        min_time: Minimum time in seconds to call the function for.
+
+    Returns:
+        The mean time of a call in seconds.
+    """
+    number = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= min_time:
+            return elapsed / number
+        number *= 2
+
+
+def _get_dataset(num_vectors: int, dimension: int) -> tool.Dataset:
+    """Creates an in-memory dataset of random vectors, the same every time."""
+    rng = np.random.default_rng(0)
+    file = h5py.File(f'selfbench-{uuid.uuid4()}.hdf5',
+                     'w',
+                     driver='core',
+                     backing_store=False)
+    train = file.create_dataset(
+        'train', data=rng.random((num_vectors, dimension), dtype=np.float32))
+    test = file.create_dataset(
+        'test', data=rng.random((num_vectors, dimension), dtype=np.float32))
+    return tool.Dataset(train=train, test=test)
+
+
+def _get_service_config(host: str, port: int, dimension: int,
+                        bulk_size: int) -> opensearch_parser.OpenSearchConfig:
+    """Creates the config of the OpenSearch tests run against the mock."""
+    return opensearch_parser.OpenSearchConfig(
+        endpoints=[opensearch_parser.EndpointConfig(host=host, port=port)],
+        host_selection='round_robin',
+        pool_maxsize=10,
+        keep_alive=True,
+        index_spec={
+            'mappings': {
+                'properties': {
+                    'test_vector': {
+                        'type': 'knn_vector',
+                        'dimension': dimension
+                    }
+                }
+            }
+        },
+        max_num_segments=1,
+        index_thread_qty=1,
+        bulk_size=bulk_size,
+        bulk_workers=1,
+        autotune=None,
+        ingest_optimized=None,
+        k=mock.NUM_HITS,
+        query_driver='sync',
+        query_concurrency=1,
+        ingest_rate=1000,
+        ingest_refresh_interval='1s',
+        score_recall=False,
+        msearch_size=1,
+        query_sampling=opensearch_parser.QuerySamplingConfig(mode='dataset',
+                                                             num_queries=1,
+                                                             duration=0,
+                                                             replacement=True,
+                                                             seed=0),
+        query_profile=opensearch_parser.QueryProfileConfig(fraction=0,
+                                                           seed=0),
+        filter=opensearch_parser.FilterConfig(selectivities=[1],
+                                              template='efficient',
+                                              seed=0),
+        growth=opensearch_parser.GrowthConfig(increments=1,
+                                              num_queries=1,
+                                              seed=0),
+        churn=opensearch_parser.ChurnConfig(operation='delete',
+                                            fraction=0,
+                                            seed=0),
+        quantization=opensearch_parser.QuantizationConfig(type='byte',
+                                                          scale=None),
+        train=opensearch_parser.TrainConfig(model_spec=None,
+                                            model_id='test_model',
+                                            num_vectors=1,
+                                            seed=0,
+                                            poll_interval=0,
+                                            timeout=0))
+
+
+def run_microbenchmarks(dimension: int, bulk_size: int,
+                        k: int) -> Dict[str, float]:
+    """Benchmarks the pure-Python hot paths of okpt.
+
+    Args:
+        dimension: Dimension of the vectors.
+        bulk_size: Number of vectors in one bulk request.
+        k: Number of neighbors searched for.
+
+    Returns:
+        The time of each hot path, in microseconds per operation.
+    """
+    rng = np.random.default_rng(0)
+    partition = rng.random((bulk_size, dimension), dtype=np.float32)
+    vector = partition[0]
+    serializer = JSONSerializer()
+    bulk_body = opensearch_s.bulk_transform(partition, 'test_index', 0)
+    search_response = {
+        'took': 0,
+        'hits': {
+            'hits': [{
+                '_id': str(i),
+                '_score': 1.0
+            } for i in range(k)]
+        }
+    }
+    steps = [{
+        'label': 'query_index',
+        'took': float(took),
+        'latency': float(took),
+    } for took in rng.random(_NUM_AGGREGATED_STEPS)]
+
+    def per(seconds: float, num_operations: int = 1) -> float:
+        return seconds / num_operations * 1e6
+
+    return {
+        'bulk_transform_us_per_doc':
+            per(
+                _get_seconds_per_call(lambda: opensearch_s.bulk_transform(
+                    partition, 'test_index', 0)), bulk_size),
+        'bulk_serialize_us_per_doc':
+            per(
+                _get_seconds_per_call(
+                    lambda: [serializer.dumps(line) for line in bulk_body]),
+                bulk_size),
+        'query_body_us':
+            per(
+                _get_seconds_per_call(lambda: serializer.dumps(
+                    opensearch_s._get_query_body(vector, k)))),
+        'parse_search_response_us':
+            per(
+                _get_seconds_per_call(
+                    lambda: opensearch_s._parse_search_response(
+                        search_response))),
+        'step_execute_us':
+            per(_get_seconds_per_call(_NoopStep().execute)),
+        'aggregate_steps_us_per_step':
+            per(
+                _get_seconds_per_call(lambda: base_t._aggregate_steps(
+                    [dict(step) for step in steps], ['took', 'latency'])),
+                len(steps)),
+        'extract_samples_us_per_step':
+            per(
+                _get_seconds_per_call(lambda: base_t._extract_samples(
+                    steps, ['took', 'latency'])), len(steps)),
+    }
+
+
+def run_mock_benchmarks(num_vectors: int, dimension: int, bulk_size: int,
+                        query_concurrency: int) -> Dict[str, float]:
+    """Benchmarks the OpenSearch tests against a zero-latency mock server.
+
+    Args:
+        num_vectors: Number of vectors to index, and to query.
+        dimension: Dimension of the vectors.
+        bulk_size: Number of vectors in one bulk request.
+        query_concurrency: Concurrency of the async and process drivers.
+
+    Returns:
+        The maximum achievable throughput of indexing and of each query
+        driver, and the overhead per operation in microseconds.
+    """
+    dataset = _get_dataset(num_vectors, dimension)
+    result: Dict[str, float] = {}
+    with mock.MockOpenSearch() as (host, port):
+        service_config = _get_service_config(host, port, dimension, bulk_size)
+
+        index_test = opensearch_t.OpenSearchIndexTest(service_config, dataset)
+        index_test.setup()
+        start_time = time.perf_counter()
+        index_test.execute()
+        index_took = time.perf_counter() - start_time
+        result['index_docs_per_sec'] = num_vectors / index_took
+        result['index_us_per_doc'] = index_took / num_vectors * 1e6
+
+        for query_driver in _QUERY_DRIVERS:
+            driver_config = dataclasses.replace(
+                service_config,
+                query_driver=query_driver,
+                query_concurrency=1
+                if query_driver == 'sync' else query_concurrency)
+            query_test = opensearch_t.OpenSearchQueryTest(
+                driver_config, dataset)
+            query_test.setup()
+            query_per_sec = query_test.execute()['query_per_sec']
+            result[f'query_{query_driver}_per_sec'] = query_per_sec
+            result[f'query_{query_driver}_us_per_query'] = 1e6 / query_per_sec
+            logging.info(f'Query driver `{query_driver}`: '
+                         f'{query_per_sec:.0f} queries/sec.')
+    return result
+
+
+def run(num_vectors: int = 10000,
+        dimension: int = 128,
+        bulk_size: int = 500,
+        query_concurrency: int = 8,
+        suites: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Runs the self-benchmark.
+
+    Args:
+        num_vectors: Number of vectors to index, and to query.
+        dimension: Dimension of the vectors.
+        bulk_size: Number of vectors in one bulk request.
+        query_concurrency: Concurrency of the async and process drivers.
+        suites: Suites to run, from `SUITES`; all of them if not given.
+
+    Returns:
+        The self-benchmark results, with the parameters they were measured
+        with.
+    """
+    suites = suites or SUITES
+    result: Dict[str, Any] = {
+        'parameters': {
+            'num_vectors': num_vectors,
+            'dimension': dimension,
+            'bulk_size': bulk_size,
+            'query_concurrency': query_concurrency,
+        },
+    }
+    if 'micro' in suites:
+        result['micro'] = run_microbenchmarks(dimension, bulk_size,
+                                              mock.NUM_HITS)
+    if 'mock' in suites:
+        result['mock'] = run_mock_benchmarks(num_vectors, dimension,
+                                             bulk_size, query_concurrency)
+    if 'startup' in suites:
+        result['startup'] = startup.run()
+    return result
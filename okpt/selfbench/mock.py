@@ -0,0 +1,181 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides a zero-latency stand-in for an OpenSearch server.
+
+The server answers every request with a canned response, without indexing or
+searching anything, so that tests run against it only measure okpt and the
+OpenSearch client. It runs in its own process, so that it does not compete
+with the benchmarked client for the GIL, and serves every connection from one
+asyncio event loop, writing each response with a single send.
+
+Classes:
+    MockOpenSearch: Context manager running the stand-in server.
+"""
+import asyncio
+import json
+import multiprocessing
+import socket
+from typing import Optional, Tuple
+
+NUM_HITS = 10
+
+
+def _json(body) -> bytes:
+    return json.dumps(body).encode()
+
+
+_SEARCH_RESPONSE = {
+    'took': 0,
+    'hits': {
+        'hits': [{
+            '_id': str(i),
+            '_score': 1.0
+        } for i in range(NUM_HITS)]
+    }
+}
+_SEARCH_BODY = _json(_SEARCH_RESPONSE)
+_ACK_BODY = _json({'acknowledged': True})
+_COUNT_BODY = _json({'count': 0})
+# every index stats metric read by the tests, whichever was requested
+_STATS_BODY = _json({
+    '_all': {
+        'primaries': {
+            'store': {
+                'size_in_bytes': 0
+            },
+            'segments': {
+                'count': 1
+            },
+            'docs': {
+                'count': 0,
+                'deleted': 0
+            },
+        }
+    }
+})
+_KNN_STATS_BODY = _json({'nodes': {'mock': {'graph_memory_usage': 0}}})
+
+
+def _get_response_body(method: str, path: str, body: bytes) -> bytes:
+    """Gets the canned response body of a request."""
+    if '/_bulk' in path:
+        # one item per action, so the response grows with the request
+        num_items = body.count(b'\n') // 2
+        return (b'{"took":0,"errors":false,"items":[' +
+                b','.join([b'{}'] * num_items) + b']}')
+    if '/_msearch' in path:
+        num_responses = body.count(b'\n') // 2
+        return (b'{"took":0,"responses":[' +
+                b','.join([_SEARCH_BODY] * num_responses) + b']}')
+    if '/_search' in path:
+        return _SEARCH_BODY
+    if '/_count' in path:
+        return _COUNT_BODY
+    if '/_stats' in path:
+        return _STATS_BODY
+    if '/_knn/stats' in path:
+        return _KNN_STATS_BODY
+    if '/_knn/models/' in path and method == 'GET':
+        return _json({'state': 'created', 'model_blob': ''})
+    return _ACK_BODY
+
+
+def _get_response(method: str, path: str, body: bytes) -> bytes:
+    """Gets the canned HTTP response of a request."""
+    response_body = b'' if method == 'HEAD' else _get_response_body(
+        method, path, body)
+    return (b'HTTP/1.1 200 OK\r\n'
+            b'content-type: application/json; charset=UTF-8\r\n'
+            b'content-length: ' + str(len(response_body)).encode() +
+            b'\r\n\r\n' + response_body)
+
+
+async def _handle(reader: asyncio.StreamReader,
+                  writer: asyncio.StreamWriter):
+    """Serves the keep-alive requests of one connection."""
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            method, path, _ = request_line.split(' ', 2)
+            content_length, close = 0, False
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                name = name.strip().lower()
+                if name == 'content-length':
+                    content_length = int(value)
+                elif name == 'connection':
+                    close = value.strip().lower() == 'close'
+            body = await reader.readexactly(content_length)
+            writer.write(_get_response(method, path, body))
+            await writer.drain()
+            if close:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _serve(sock: socket.socket, ready):
+    """Serves requests on a bound socket until the process is terminated."""
+
+    async def serve():
+        server = await asyncio.start_server(_handle, sock=sock, backlog=1024)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+class MockOpenSearch():
+    """Runs a zero-latency stand-in for an OpenSearch server in a separate
+    process, for as long as the context is entered.
+
+    Attributes:
+        host: Host the server listens on.
+        port: Port the server listens on, picked by the OS.
+    """
+
+    def __init__(self, host: str = '127.0.0.1'):
+        self.host = host
+        self.port = 0
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> Tuple[str, int]:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, 0))
+        self.port = sock.getsockname()[1]
+        ready = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=_serve,
+                                                args=(sock, ready),
+                                                daemon=True)
+        self._process.start()
+        sock.close()
+        ready.wait()
+        return self.host, self.port
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
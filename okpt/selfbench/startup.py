@@ -0,0 +1,101 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides a startup-time benchmark of the okpt commands.
+
+Every command is run in a fresh interpreter, as in a CI pipeline, and timed
+from process start to exit. The import time of each backend's test module is
+measured too, since it is only paid by the tests of that backend.
+
+Functions:
+    run(): Benchmark the startup time of the okpt commands.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import okpt
+
+_NUM_REPEATS = 10
+_BACKENDS = ['opensearch', 'nmslib', 'faiss', 'bruteforce']
+_RUN_MAIN = 'import okpt.main; okpt.main.main()'
+
+
+def _get_run_times(command: List[str], num_repeats: int) -> List[float]:
+    """Runs a command in a fresh interpreter, in the directory above the
+    okpt package.
+
+    Args:
+        command: Arguments of the Python interpreter.
+        num_repeats: Number of times to run the command.
+
+    Returns:
+        The wall time of each run in milliseconds.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(okpt.__file__)))
+    run_times = []
+    for _ in range(num_repeats):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, *command],
+                       cwd=root,
+                       check=True,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        run_times.append((time.perf_counter() - start_time) * 1000)
+    return run_times
+
+
+def run(num_repeats: int = _NUM_REPEATS) -> Dict[str, float]:
+    """Benchmarks the startup time of the okpt commands.
+
+    Args:
+        num_repeats: Number of times to run each command.
+
+    Returns:
+        The minimum and median wall time of each command in milliseconds,
+        along with those of an empty interpreter for reference.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result_path = os.path.join(tmp_dir, 'result.json')
+        with open(result_path, 'w') as file:
+            json.dump({'metadata': {}, 'results': {'test_took': 1.0}}, file)
+
+        commands = {
+            'python': ['-c', 'pass'],
+            'help': ['-c', _RUN_MAIN, '--help'],
+            'diff': ['-c', _RUN_MAIN, 'diff', result_path, result_path],
+            **{
+                f'import_{backend}': [
+                    '-c', f'import okpt.test.tests.{backend}'
+                ] for backend in _BACKENDS
+            },
+        }
+
+        result = {}
+        for name, command in commands.items():
+            try:
+                run_times = _get_run_times(command, num_repeats)
+            except subprocess.CalledProcessError:
+                # e.g. the libraries of a backend are not installed
+                continue
+            result[f'{name}_ms_min'] = min(run_times)
+            result[f'{name}_ms_p50'] = statistics.median(run_times)
+        return result
@@ -0,0 +1,117 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides OpenSearch connection classes for client-side load balancing.
+
+The connections count their in-flight requests, so that requests can be sent
+to the least busy host, and record the host that served the latest request of
+the current thread or asyncio task, so that measures can be broken down by
+host.
+
+Functions:
+    get_last_host(): Get the host that served the latest request.
+"""
+import contextvars
+import threading
+
+from opensearchpy import AIOHttpConnection, RequestsHttpConnection
+from opensearchpy.connection_pool import ConnectionSelector, RoundRobinSelector
+from requests.adapters import HTTPAdapter
+
+_last_host = contextvars.ContextVar('last_host', default='')
+
+
+def get_last_host() -> str:
+    """Get the host that served the latest request of the current thread or
+    asyncio task.
+
+    Returns:
+        The host as `{hostname}:{port}`, or an empty string if no request was
+        made yet.
+    """
+    return _last_host.get()
+
+
+class _InflightMixin():
+    """Counts the in-flight requests of a connection."""
+
+    def _init_inflight(self):
+        self.inflight = 0
+        self.inflight_lock = threading.Lock()
+        self.host_label = f'{self.hostname}:{self.port}'
+
+    def _start_request(self):
+        with self.inflight_lock:
+            self.inflight += 1
+        _last_host.set(self.host_label)
+
+    def _end_request(self):
+        with self.inflight_lock:
+            self.inflight -= 1
+
+
+class TrackedRequestsHttpConnection(RequestsHttpConnection, _InflightMixin):
+    """See base class. Counts in-flight requests and keeps up to `pool_maxsize`
+    connections open to the host."""
+
+    def __init__(self, *args, pool_maxsize: int = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_inflight()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def perform_request(self, *args, **kwargs):
+        self._start_request()
+        try:
+            return super().perform_request(*args, **kwargs)
+        finally:
+            self._end_request()
+
+
+class TrackedAIOHttpConnection(AIOHttpConnection, _InflightMixin):
+    """See base class. Counts in-flight requests."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_inflight()
+
+    async def perform_request(self, *args, **kwargs):
+        self._start_request()
+        try:
+            return await super().perform_request(*args, **kwargs)
+        finally:
+            self._end_request()
+
+
+class LeastInflightSelector(ConnectionSelector):
+    """See base class. Selects the connection with the fewest in-flight
+    requests, breaking ties round-robin."""
+
+    def __init__(self, opts):
+        super().__init__(opts)
+        self.rr = -1
+
+    def select(self, connections):
+        self.rr = (self.rr + 1) % len(connections)
+        rotated = [*connections[self.rr:], *connections[:self.rr]]
+        return min(rotated, key=lambda connection: connection.inflight)
+
+
+selectors = {
+    'round_robin': RoundRobinSelector,
+    'least_inflight': LeastInflightSelector,
+}
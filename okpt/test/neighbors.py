@@ -0,0 +1,250 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides exact nearest neighbor search and recall for scoring k-NN results.
+
+Exact neighbors are found by brute force: distances are computed with float32
+matrix multiplication between blocks of queries and tiles of train vectors, so
+memory stays bounded, and the k closest of each tile are kept with
+`argpartition` and merged. Query blocks are spread across threads, since NumPy
+releases the GIL during matrix multiplication.
+
+Ground truth is cached on disk, keyed by a hash of the train and query
+vectors and the space type, so that it is only computed once per dataset.
+
+Functions:
+    exact_knn(): Find the exact nearest neighbors of query vectors.
+    get_ground_truth(): Get the exact nearest neighbors, through the cache.
+    recall(): Calculate the recall of query results.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+_QUERY_BLOCK_SIZE = 1024
+_TRAIN_TILE_SIZE = 65536
+_HASH_BLOCK_SIZE = 65536
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'okpt',
+                          'ground_truth')
+# space types whose exact neighbors can be computed
+SPACE_TYPES = ['l2', 'cosinesimil', 'innerproduct']
+
+
+def _get_distances(train: np.ndarray, queries: np.ndarray,
+                   space_type: str) -> np.ndarray:
+    """Calculates the distances between query and train vectors, where a
+    smaller distance is a closer neighbor.
+
+    Args:
+        train: Array of train vectors.
+        queries: Array of query vectors.
+        space_type: Space type of the k-NN index, e.g. `l2`.
+
+    Returns:
+        A matrix with a row of distances to the train vectors per query.
+    """
+    if space_type == 'l2':
+        return (np.einsum('ij,ij->i', queries, queries)[:, None] -
+                2 * queries @ train.T +
+                np.einsum('ij,ij->i', train, train)[None, :])
+    if space_type == 'cosinesimil':
+        train_norms = np.linalg.norm(train, axis=1)
+        query_norms = np.linalg.norm(queries, axis=1)
+        train_norms[train_norms == 0] = 1
+        query_norms[query_norms == 0] = 1
+        return -(queries @ train.T) / np.outer(query_norms, train_norms)
+    if space_type == 'innerproduct':
+        return -(queries @ train.T)
+    raise ValueError(f'Unsupported space type `{space_type}`.')
+
+
+def _top_k(distances: np.ndarray, ids: np.ndarray, k: int):
+    """Selects the k smallest distances of each row, unordered.
+
+    Args:
+        distances: Matrix of distances, one row per query.
+        ids: Matrix of the train positions of the distances.
+        k: Number of neighbors to keep.
+
+    Returns:
+        The selected distances and their train positions.
+    """
+    if k < distances.shape[1]:
+        top_k = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        distances = np.take_along_axis(distances, top_k, axis=1)
+        ids = np.take_along_axis(ids, top_k, axis=1)
+    return distances, ids
+
+
+def _block_exact_knn(train: np.ndarray, queries: np.ndarray, k: int,
+                     space_type: str, tile_size: int) -> np.ndarray:
+    """Finds the exact nearest neighbors of a block of queries, one train
+    tile at a time.
+
+    Args:
+        train: Array of train vectors.
+        queries: Block of query vectors.
+        k: Number of neighbors to search for, at most the train size.
+        space_type: Space type of the k-NN index, e.g. `l2`.
+        tile_size: Number of train vectors per tile.
+
+    Returns:
+        A matrix with the train positions of the nearest neighbors of each
+        query, closest first.
+    """
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    for i in range(0, len(train), tile_size):
+        distances = _get_distances(train[i:i + tile_size], queries,
+                                   space_type)
+        ids = np.broadcast_to(
+            np.arange(i, i + distances.shape[1], dtype=np.int64),
+            distances.shape)
+        best_distances, best_ids = _top_k(
+            np.concatenate([best_distances, distances], axis=1),
+            np.concatenate([best_ids, ids], axis=1), k)
+
+    order = np.argsort(best_distances, axis=1, kind='stable')
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def exact_knn(train: np.ndarray,
+              queries: np.ndarray,
+              k: int,
+              space_type: str = 'l2',
+              tile_size: int = _TRAIN_TILE_SIZE,
+              num_threads: int = 1) -> np.ndarray:
+    """Finds the exact nearest neighbors of query vectors by brute force.
+
+    Queries are processed in blocks, and train vectors in tiles, to bound the
+    size of the distance matrix.
+
+    Args:
+        train: Array of train vectors.
+        queries: Array of query vectors.
+        k: Number of neighbors to search for.
+        space_type: Space type of the k-NN index, e.g. `l2`.
+        tile_size: Number of train vectors per tile.
+        num_threads: Number of threads processing query blocks.
+
+    Returns:
+        A matrix with the train positions of the nearest neighbors of each
+        query, closest first. Rows hold fewer than k neighbors if there are
+        fewer train vectors.
+    """
+    train = np.asarray(train, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, len(train))
+    neighbors = np.empty((len(queries), k), dtype=np.int64)
+
+    def search_block(i: int):
+        neighbors[i:i + _QUERY_BLOCK_SIZE] = _block_exact_knn(
+            train, queries[i:i + _QUERY_BLOCK_SIZE], k, space_type, tile_size)
+
+    blocks = range(0, len(queries), _QUERY_BLOCK_SIZE)
+    if num_threads > 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            list(executor.map(search_block, blocks))
+    else:
+        for i in blocks:
+            search_block(i)
+    return neighbors
+
+
+def _hash_vectors(hash_obj, vectors: np.ndarray):
+    """Feeds the shape and float32 values of vectors to a hash, in blocks."""
+    hash_obj.update(str(vectors.shape).encode())
+    for i in range(0, len(vectors), _HASH_BLOCK_SIZE):
+        block = np.ascontiguousarray(vectors[i:i + _HASH_BLOCK_SIZE],
+                                     dtype=np.float32)
+        hash_obj.update(block.tobytes())
+
+
+def get_ground_truth(train: np.ndarray,
+                     queries: np.ndarray,
+                     k: int,
+                     space_type: str = 'l2',
+                     tile_size: int = _TRAIN_TILE_SIZE,
+                     num_threads: int = 1,
+                     cache_dir: Optional[str] = _CACHE_DIR) -> np.ndarray:
+    """Gets the exact nearest neighbors of query vectors, computing them only
+    if they are not cached.
+
+    The cache holds one file per dataset and space type. A cached file with at
+    least k neighbors per query is reused; otherwise the neighbors are
+    computed and the file is replaced.
+
+    Args:
+        train: Array of train vectors.
+        queries: Array of query vectors.
+        k: Number of neighbors to search for.
+        space_type: Space type of the k-NN index, e.g. `l2`.
+        tile_size: Number of train vectors per tile.
+        num_threads: Number of threads processing query blocks.
+        cache_dir: Directory of the cache, or None to not cache.
+
+    Returns:
+        A matrix with the train positions of the nearest neighbors of each
+        query, closest first.
+    """
+    if cache_dir is None:
+        return exact_knn(train, queries, k, space_type, tile_size,
+                         num_threads)
+
+    hash_obj = hashlib.sha256()
+    _hash_vectors(hash_obj, train)
+    _hash_vectors(hash_obj, queries)
+    path = os.path.join(cache_dir,
+                        f'{hash_obj.hexdigest()[:32]}_{space_type}.npy')
+
+    k = min(k, len(train))
+    if os.path.exists(path):
+        neighbors = np.load(path)
+        if neighbors.shape[1] >= k:
+            logging.info(f'Using cached ground truth `{path}`.')
+            return neighbors[:, :k]
+
+    neighbors = exact_knn(train, queries, k, space_type, tile_size,
+                          num_threads)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(tmp_path, neighbors)
+    os.replace(tmp_path, path)
+    return neighbors
+
+
+def recall(results: np.ndarray, neighbors: np.ndarray) -> float:
+    """Calculates the mean recall of query results against exact neighbors.
+
+    Args:
+        results: Matrix of result ids per query, padded with -1.
+        neighbors: Matrix of exact neighbor ids per query, padded with -1.
+
+    Returns:
+        The mean fraction of exact neighbors found per query.
+    """
+    recalls = []
+    for result_ids, neighbor_ids in zip(results, neighbors):
+        neighbor_ids = neighbor_ids[neighbor_ids >= 0]
+        if len(neighbor_ids) == 0:
+            continue
+        found = np.intersect1d(result_ids[result_ids >= 0], neighbor_ids)
+        recalls.append(len(found) / len(neighbor_ids))
+    return float(np.mean(recalls)) if recalls else -1
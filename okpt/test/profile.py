@@ -20,6 +20,7 @@ The decorators work by adding a `measureable` (time, memory, etc) field to a
 dictionary returned by the wrapped function. So the wrapped functions must
 return a dictionary in order to be profiled.
 """
+import asyncio
 import functools
 import time
 from typing import Callable
@@ -66,16 +67,30 @@ class _Timer():
         return elapsed
 
 
-def took(f: Callable):
-    """Profiles a functions execution time.
+def _profile_time(f: Callable, add_measure: Callable):
+    """Times a function and adds the elapsed time to its result.
+
+    Coroutine functions are wrapped with a coroutine function, so that the time
+    spent awaiting them is measured.
 
     Args:
         f: Function to profile.
+        add_measure: Function adding the elapsed time to the result.
 
     Returns:
-        A function that wraps the passed in function and adds a time took field
-        to the return value.
+        A function that wraps the passed in function.
     """
+    if asyncio.iscoroutinefunction(f):
+
+        @functools.wraps(f)
+        async def async_wrapper(*args, **kwargs):
+            """Async wrapper function."""
+            timer = _Timer()
+            timer.start()
+            result = await f(*args, **kwargs)
+            return add_measure(result, timer.end())
+
+        return async_wrapper
 
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
@@ -83,14 +98,51 @@ def took(f: Callable):
         timer = _Timer()
         timer.start()
         result = f(*args, **kwargs)
-        time_took = timer.end()
-
-        # if result already has a `took` field, don't modify the result
-        if isinstance(result, dict) and 'took' in result:
-            return result
-        # `result` may not be a dictionary, so it may not be unpackable
-        elif isinstance(result, dict):
-            return {**result, 'took': time_took}
-        return {'took': time_took}
+        return add_measure(result, timer.end())
 
     return wrapper
+
+
+def _add_took(result, time_took: float):
+    # if result already has a `took` field, don't modify the result
+    if isinstance(result, dict) and 'took' in result:
+        return result
+    # `result` may not be a dictionary, so it may not be unpackable
+    elif isinstance(result, dict):
+        return {**result, 'took': time_took}
+    return {'took': time_took}
+
+
+def _add_latency(result, time_took: float):
+    if isinstance(result, dict):
+        return {**result, 'latency': time_took}
+    return {'latency': time_took}
+
+
+def took(f: Callable):
+    """Profiles a functions execution time.
+
+    Args:
+        f: Function to profile.
+
+    Returns:
+        A function that wraps the passed in function and adds a time took field
+        to the return value.
+    """
+    return _profile_time(f, _add_took)
+
+
+def latency(f: Callable):
+    """Profiles a functions client-side latency.
+
+    Unlike `took`, the elapsed time is always recorded, even if the wrapped
+    function returns a response with its own (server-side) `took` field.
+
+    Args:
+        f: Function to profile.
+
+    Returns:
+        A function that wraps the passed in function and adds a latency field
+        to the return value.
+    """
+    return _profile_time(f, _add_latency)
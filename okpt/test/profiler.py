@@ -0,0 +1,194 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides opt-in client-side profiling of test steps and phases.
+
+Selected targets, either step labels like `bulk_add` or the test phases
+`setup` and `run`, are profiled whenever they execute, with one of:
+
+- `cprofile`: deterministic profiling with cProfile, written as a pstats
+  file, e.g. for `python -m pstats` or snakeviz;
+- `sampling`: a background thread samples the stacks of the threads running
+  a target every `interval` seconds, written as collapsed stacks, e.g. for
+  flamegraph.pl or speedscope.
+
+Only the thread running a target is profiled, so concurrent asyncio tasks
+interleaved with an async step are profiled with it, and steps run by the
+process query driver, in worker processes, are not profiled.
+
+Attributes:
+    profiler: The profiler used by `Step.execute` and the test runner.
+"""
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+_DEFAULT_INTERVAL = 0.001
+
+
+def _get_frame_name(frame) -> str:
+    """Names a stack frame for collapsed stacks, which are `;` separated."""
+    code = frame.f_code
+    file_name = os.path.basename(code.co_filename)
+    return f'{code.co_name} ({file_name}:{code.co_firstlineno})'.replace(
+        ';', ':')
+
+
+class Profiler():
+    """Profiles the selected steps and phases.
+
+    Attributes:
+        enabled: Whether any target is profiled.
+
+    Methods:
+        start: Start profiling targets.
+        stop: Stop profiling.
+        profile: Context manager profiling a block if it is a target.
+        write: Write the profile next to a result file.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.mode = 'cprofile'
+        self.targets: Set[str] = set()
+        self.interval = _DEFAULT_INTERVAL
+        self._lock = threading.Lock()
+        # per thread: nesting depth of targets, and cProfile profiler
+        self._depths: Dict[int, int] = {}
+        self._profiles: Dict[int, cProfile.Profile] = {}
+        self._stacks: Counter = Counter()
+        self._stop_sampling = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self,
+              targets: List[str],
+              mode: str = 'cprofile',
+              interval: float = _DEFAULT_INTERVAL):
+        """Clears the profile and starts profiling targets.
+
+        Args:
+            targets: Step labels and phases (`setup`, `run`) to profile.
+            mode: `cprofile` or `sampling`.
+            interval: Seconds between stack samples in `sampling` mode.
+        """
+        self.mode = mode
+        self.targets = set(targets)
+        self.interval = interval
+        self._depths = {}
+        self._profiles = {}
+        self._stacks = Counter()
+        if mode == 'sampling':
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample,
+                                             name='okpt-sampler',
+                                             daemon=True)
+            self._sampler.start()
+        self.enabled = True
+
+    def stop(self):
+        """Stops profiling, keeping the profile."""
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample(self):
+        """Samples the stacks of the threads running a target until
+        stopped."""
+        while not self._stop_sampling.wait(self.interval):
+            with self._lock:
+                thread_ids = [
+                    thread_id for thread_id, depth in self._depths.items()
+                    if depth > 0
+                ]
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_get_frame_name(frame))
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[';'.join(reversed(stack))] += 1
+
+    @contextlib.contextmanager
+    def profile(self, target: str):
+        """Profiles a block if it is a target. Targets nested in another
+        target are profiled as part of it.
+
+        Blocks of a thread may also overlap without nesting, e.g. the steps
+        of concurrent asyncio tasks, so the thread is profiled from the first
+        block entered until the last one exits.
+
+        Args:
+            target: Step label or phase of the block.
+        """
+        if not self.enabled or target not in self.targets:
+            yield
+            return
+
+        thread_id = threading.get_ident()
+        with self._lock:
+            depth = self._depths.get(thread_id, 0)
+            self._depths[thread_id] = depth + 1
+            if self.mode == 'cprofile' and depth == 0:
+                self._profiles.setdefault(thread_id,
+                                          cProfile.Profile()).enable()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depths[thread_id] -= 1
+                if self.mode == 'cprofile' and self._depths[thread_id] == 0:
+                    self._profiles[thread_id].disable()
+
+    def write(self, path: str) -> Optional[str]:
+        """Writes the profile, as `{path}.pstats` in `cprofile` mode or as
+        `{path}.collapsed` in `sampling` mode.
+
+        Args:
+            path: Path of the profile, without extension.
+
+        Returns:
+            The path of the written file, or None if nothing was profiled.
+        """
+        if self.mode == 'cprofile':
+            if not self._profiles:
+                return None
+            profiles = list(self._profiles.values())
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            file_path = f'{path}.pstats'
+            stats.dump_stats(file_path)
+            return file_path
+
+        if not self._stacks:
+            return None
+        file_path = f'{path}.collapsed'
+        with open(file_path, 'w') as file:
+            for stack, count in self._stacks.most_common():
+                file.write(f'{stack} {count}\n')
+        return file_path
+
+
+profiler = Profiler()
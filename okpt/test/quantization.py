@@ -0,0 +1,121 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides reduced-precision quantization of vectors for the k-NN plugin.
+
+Datasets are quantized as a whole, in one vectorized pass, to either:
+
+- `byte`: scaled, rounded and clipped to int8, for k-NN fields with the
+  `byte` data type, which the Lucene and Faiss engines support;
+- `fp16`: rounded to float16, for the fp16 scalar quantization encoder of the
+  Faiss engine.
+
+Quantized datasets take 1 or 2 bytes per value, and keep the bulk payloads
+compact: bytes are sent as small integers, and float16 values as their
+shortest decimal, see `opensearch.bulk_transform`.
+
+Functions:
+    get_byte_scale(): Get the scale that maps vectors onto the int8 range.
+    quantize(): Quantize an array of vectors.
+    get_index_spec(): Get the index spec of quantized vectors.
+"""
+import copy
+from typing import Any, Dict
+
+import numpy as np
+
+from okpt.io.config.parsers.base import ConfigurationError
+
+_BYTE_MAX = 127
+
+# quantization type -> engines that support it
+_engines = {
+    'byte': ['lucene', 'faiss'],
+    'fp16': ['faiss'],
+}
+
+
+def get_byte_scale(vectors: np.ndarray) -> float:
+    """Gets the scale that maps the largest absolute value of the vectors to
+    the int8 maximum.
+
+    Args:
+        vectors: Array of vectors, e.g. the train set.
+
+    Returns:
+        The scale of the `byte` quantization.
+    """
+    max_value = float(np.abs(vectors).max(initial=0))
+    return _BYTE_MAX / max_value if max_value > 0 else 1.0
+
+
+def quantize(vectors: np.ndarray,
+             quantization_type: str,
+             scale: float = 1.0) -> np.ndarray:
+    """Quantizes an array of vectors.
+
+    Args:
+        vectors: Array of vectors.
+        quantization_type: `byte` or `fp16`.
+        scale: Factor the vectors are multiplied by before `byte`
+            quantization, e.g. from `get_byte_scale`.
+
+    Returns:
+        An int8 array for `byte`, or a float16 array for `fp16`.
+    """
+    if quantization_type == 'byte':
+        return np.clip(np.rint(vectors * scale), -_BYTE_MAX - 1,
+                       _BYTE_MAX).astype(np.int8)
+    return vectors.astype(np.float16)
+
+
+def get_index_spec(index_spec: Dict[str, Any],
+                   quantization_type: str) -> Dict[str, Any]:
+    """Gets the index spec of quantized vectors from that of full-precision
+    vectors.
+
+    Args:
+        index_spec: Index spec with a `test_vector` k-NN field.
+        quantization_type: `byte` or `fp16`.
+
+    Returns:
+        A copy of the index spec, with the `byte` data type or the fp16
+        encoder on the k-NN field.
+
+    Raises:
+        ConfigurationError: If the engine of the k-NN field does not support
+            the quantization type.
+    """
+    quantized_spec = copy.deepcopy(index_spec)
+    field = quantized_spec.get('mappings', {}).get('properties',
+                                                   {}).get('test_vector', {})
+    method = field.setdefault('method', {})
+    engine = method.get('engine', 'nmslib')
+    if engine not in _engines[quantization_type]:
+        raise ConfigurationError(
+            f'{quantization_type} quantization requires the '
+            f'{" or ".join(_engines[quantization_type])} engine, not {engine}.')
+
+    if quantization_type == 'byte':
+        field['data_type'] = 'byte'
+    else:
+        method.setdefault('parameters', {})['encoder'] = {
+            'name': 'sq',
+            'parameters': {
+                'type': 'fp16'
+            }
+        }
+    return quantized_spec
@@ -16,15 +16,22 @@
 # under the License.
 """Provides a test runner class."""
 import dataclasses
+import hashlib
+import json
 import logging
+import math
+import os
 import platform
 import sys
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, cast
 
+import numpy as np
 import psutil
 
-from okpt.io.config.parsers import tool
+from okpt.io.config.parsers import base, tool
+from okpt.io.utils import journal
+from okpt.test import profiler, trace
 from okpt.test.tests import factory
 
 
@@ -62,17 +69,175 @@ def _aggregate_runs(runs: List[Dict[str, Any]]):
     return aggregate
 
 
+def _get_normal_quantile(p: float) -> float:
+    """Gets the quantile of the standard normal distribution, by bisection.
+
+    Args:
+        p: Probability, between 0 and 1.
+
+    Returns:
+        The value below which a standard normal variable falls with
+        probability p.
+    """
+    low, high = -10.0, 10.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if (1 + math.erf(mid / math.sqrt(2))) / 2 < p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def _get_t_quantile(p: float, df: int) -> float:
+    """Gets the quantile of Student's t distribution.
+
+    Exact for 1 and 2 degrees of freedom, where the quantile has a closed
+    form. Otherwise, uses the Cornish-Fisher expansion around the normal
+    quantile, which is within 1% up to 0.99 confidence, and within 5% at
+    0.999.
+
+    Args:
+        p: Probability, between 0 and 1.
+        df: Degrees of freedom.
+
+    Returns:
+        The value below which a t variable falls with probability p.
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = _get_normal_quantile(p)
+    return (z + (z**3 + z) / (4 * df) +
+            (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2) +
+            (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3) +
+            (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) /
+            (92160 * df**4))
+
+
+def _get_confidence_interval(values: List[float],
+                             confidence: float) -> Dict[str, float]:
+    """Gets the confidence interval of the mean of a list of values.
+
+    Args:
+        values: A list of at least 2 values.
+        confidence: Confidence level of the interval, e.g. 0.95.
+
+    Returns:
+        The mean, the bounds of the interval, and its width relative to the
+        mean, which is -1 for a zero mean unless all values are equal.
+    """
+    mean = _get_avg(values)
+    std = math.sqrt(
+        sum((value - mean)**2 for value in values) / (len(values) - 1))
+    half_width = _get_t_quantile(
+        (1 + confidence) / 2, len(values) - 1) * std / math.sqrt(len(values))
+    if mean != 0:
+        relative_width = 2 * half_width / abs(mean)
+    else:
+        relative_width = 0 if half_width == 0 else -1
+    return {
+        'mean': mean,
+        'low': mean - half_width,
+        'high': mean + half_width,
+        'relative_width': relative_width,
+    }
+
+
 class TestRunner():
     """Test runner class for running tests and aggregating the results.
 
+    Attributes:
+        run_samples: Raw samples of each test run, if `save_samples` is set.
+
     Methods:
         execute: Run the tests and aggregate the results.
     """
 
-    def __init__(self, tool_config: tool.ToolConfig):
-        """"Initializes test state and chooses the appropriate Test."""
+    def __init__(self,
+                 tool_config: tool.ToolConfig,
+                 journal_path: Optional[str] = None,
+                 resume: bool = False):
+        """"Initializes test state and chooses the appropriate Test.
+
+        Args:
+            tool_config: Performance tool configuration.
+            journal_path: Path of the journal completed runs are written to.
+            resume: Whether to skip the runs already in the journal.
+        """
         self.tool_config = tool_config
         self.test = factory.TestFactory(self.tool_config)
+        self.journal_path = journal_path
+        self.resume = resume
+        self.run_samples: List[Dict[str, np.ndarray]] = []
+        self._journal_created = False
+
+    def _get_journal_header(self):
+        """"Retrieves the fields a journal must match to be resumed.
+
+        The service config and test parameters are compared by hash, so that
+        runs with a different config, e.g. another `k`, are not mixed.
+        """
+        config = {
+            'service_config':
+                dataclasses.asdict(self.tool_config.service_config),
+            'test_parameters':
+                dataclasses.asdict(self.tool_config.test_parameters),
+        }
+        config_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode())
+        return {
+            'test_name': self.tool_config.test_name,
+            'test_id': self.tool_config.test_id,
+            'knn_service': self.tool_config.knn_service,
+            'dataset': self.tool_config.dataset_path,
+            'config_hash': config_hash.hexdigest(),
+        }
+
+    def _load_journal(self) -> List[Dict[str, Any]]:
+        """"Loads the completed runs of the journal, if resuming from one.
+
+        A new journal is only created once the first run completes, see
+        `_append_run`.
+
+        Returns:
+            The results of the runs that are already completed.
+
+        Raises:
+            ConfigurationError: If the journal belongs to a different test,
+                config or dataset.
+        """
+        if self.journal_path is None:
+            return []
+
+        if not self.resume or not os.path.exists(self.journal_path):
+            return []
+
+        journal_header, runs, run_samples = journal.read_journal(
+            self.journal_path)
+        if journal_header != self._get_journal_header():
+            raise base.ConfigurationError(
+                f'Journal {self.journal_path} was written by another test, or '
+                'with another config or dataset.')
+        if self.tool_config.test_parameters.save_samples and \
+                len(run_samples) != len(runs):
+            raise base.ConfigurationError(
+                f'Journal {self.journal_path} has no samples to resume from.')
+        self.run_samples = run_samples
+        self._journal_created = True
+        return runs
+
+    def _append_run(self, run_index: int, run: Dict[str, Any],
+                    samples: Optional[Dict[str, np.ndarray]]):
+        """Journals a completed run, creating the journal on the first one."""
+        if self.journal_path is None:
+            return
+        if not self._journal_created:
+            journal.create_journal(self.journal_path,
+                                   self._get_journal_header())
+            self._journal_created = True
+        journal.append_run(self.journal_path, run_index, run, samples)
 
     def _get_metadata(self):
         """"Retrieves the test metadata."""
@@ -96,21 +261,100 @@ class TestRunner():
                 ' (available) / ' + str(svmem.total) + ' (total)',
         }
 
+    def _get_confidence_intervals(
+            self, runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """Gets the confidence intervals of the metrics tracked by the
+        adaptive mode.
+
+        Args:
+            runs: Results of the completed runs, at least 2.
+
+        Returns:
+            The confidence interval of each tracked metric.
+        """
+        adaptive = cast(tool.AdaptiveConfig,
+                        self.tool_config.test_parameters.adaptive)
+        return {
+            metric: _get_confidence_interval([run[metric] for run in runs],
+                                             adaptive.confidence)
+            for metric in adaptive.metrics
+        }
+
+    def _check_adaptive_metrics(self, run: Dict[str, Any]):
+        """Checks that the metrics tracked by the adaptive mode are results
+        of a run, so that a misspelled metric fails on the first run instead
+        of once `min_runs` runs are done.
+
+        Args:
+            run: Result of a completed run.
+
+        Raises:
+            ConfigurationError: If a tracked metric is not a test result.
+        """
+        adaptive = self.tool_config.test_parameters.adaptive
+        if adaptive is None:
+            return
+        for metric in adaptive.metrics:
+            if metric not in run:
+                raise base.ConfigurationError(
+                    f'Adaptive metric `{metric}` is not a test result.')
+
+    def _is_converged(self, runs: List[Dict[str, Any]]) -> bool:
+        """Checks whether the adaptive mode can stop after the completed runs.
+
+        Args:
+            runs: Results of the completed runs.
+
+        Returns:
+            Whether there are `min_runs` runs and the confidence interval of
+            every tracked metric is narrow enough.
+        """
+        adaptive = self.tool_config.test_parameters.adaptive
+        if adaptive is None or len(runs) < adaptive.min_runs:
+            return False
+        return all(0 <= interval['relative_width'] <= adaptive.ci_width
+                   for interval in self._get_confidence_intervals(
+                       runs).values())
+
     def execute(self) -> Dict[str, Any]:
         """Runs the tests and aggregates the results.
 
+        The tracer and profiler are started by the caller, so that they cover
+        every runner of a scaling study.
+
+        In adaptive mode, runs stop as soon as the tracked metrics converge,
+        and at `num_runs` at the latest.
+
         Returns:
             A dictionary containing the aggregate of test results.
         """
+        runs = self._load_journal()
+        if runs:
+            logging.info(f'Resuming after {len(runs)} completed runs.')
+            self._check_adaptive_metrics(runs[0])
+
         logging.info('Setting up tests.')
-        self.test.setup()
+        with trace.tracer.span('setup'), profiler.profiler.profile('setup'):
+            self.test.setup(resume=self.resume)
         logging.info('Beginning to run tests.')
-        runs = []
-        for i in range(self.tool_config.test_parameters.num_runs):
+        for i in range(len(runs), self.tool_config.test_parameters.num_runs):
+            if self._is_converged(runs):
+                logging.info(f'Metrics converged after {i} runs.')
+                break
             logging.info(
                 f'Running test {i + 1} of {self.tool_config.test_parameters.num_runs}'
             )
-            runs.append(self.test.execute())
+            with trace.tracer.span('run', run=i), \
+                    profiler.profiler.profile('run'):
+                run = self.test.execute()
+            if not runs:
+                self._check_adaptive_metrics(run)
+            samples = None
+            if self.tool_config.test_parameters.save_samples:
+                samples = self.test.get_samples()
+                self.run_samples.append(samples)
+            self._append_run(i, run, samples)
+            runs.append(run)
 
         logging.info('Finished running tests.')
         aggregate = _aggregate_runs(runs)
@@ -125,6 +369,18 @@ class TestRunner():
                 dataclasses.asdict(self.tool_config.test_parameters)
         }
 
+        # record how far the adaptive mode got
+        if self.tool_config.test_parameters.adaptive is not None:
+            tool_result['adaptive'] = {
+                'num_runs':
+                    len(runs),
+                'converged':
+                    self._is_converged(runs),
+                'confidence_intervals':
+                    self._get_confidence_intervals(runs)
+                    if len(runs) > 1 else {},
+            }
+
         # include info about all test runs if specified in config
         if self.tool_config.test_parameters.show_runs:
             tool_result['runs'] = runs
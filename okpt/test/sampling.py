@@ -0,0 +1,71 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides seeded sampling of query vectors.
+
+Instead of going once through the test set in stored order, a query run can
+be bounded by a number of queries or by wall-clock duration, with query
+vectors sampled at random. Sampling is seeded, so every run queries the same
+vectors in the same order.
+
+Classes:
+    QuerySampler: Seeded sampler of query vector positions.
+"""
+import numpy as np
+
+
+class QuerySampler():
+    """Seeded sampler of query vector positions.
+
+    Without replacement, positions are drawn from successive shuffles of the
+    test set, so every vector is queried once before any is queried again.
+
+    Methods:
+        sample: Draw the positions of the next query vectors.
+    """
+
+    def __init__(self, num_vectors: int, replacement: bool, seed: int):
+        """Initializes the sampler.
+
+        Args:
+            num_vectors: Number of vectors to sample from.
+            replacement: Whether to sample with replacement.
+            seed: Seed of the random generator.
+        """
+        self.num_vectors = num_vectors
+        self.replacement = replacement
+        self.rng = np.random.default_rng(seed)
+        self.shuffle = np.empty(0, dtype=np.int64)
+
+    def sample(self, num_queries: int) -> np.ndarray:
+        """Draws the positions of the next query vectors.
+
+        Args:
+            num_queries: Number of positions to draw.
+
+        Returns:
+            An array of vector positions.
+        """
+        if self.replacement:
+            return self.rng.integers(self.num_vectors, size=num_queries)
+
+        while len(self.shuffle) < num_queries:
+            self.shuffle = np.concatenate(
+                [self.shuffle,
+                 self.rng.permutation(self.num_vectors)])
+        positions, self.shuffle = (self.shuffle[:num_queries],
+                                   self.shuffle[num_queries:])
+        return positions
@@ -0,0 +1,394 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides runners for dataset-size and thread scaling studies.
+
+In a dataset-size study, the test is run on nested prefixes of the train set,
+in increasing size, and growth curves are fitted to its results, so that e.g.
+the build time or index size of a much larger corpus can be predicted from
+small runs. In a thread scaling study, the test is run at each thread count,
+and the speedup and parallel efficiency of its timings are reported.
+
+Classes:
+    ScalingRunner: Dataset-size scaling study runner.
+    ThreadScalingRunner: Thread scaling study runner.
+
+Functions:
+    fit_power_law(): Fit a power law to a metric by size.
+    get_complexity(): Get the complexity class that fits a metric best.
+"""
+import dataclasses
+import logging
+import math
+import os
+import resource
+import sys
+from typing import Any, Dict, List, Optional, cast
+
+import numpy as np
+
+from okpt.io.config.parsers import base, tool, utils
+from okpt.test import runner, trace
+
+# name -> growth function of a complexity class, from the slowest growing
+_COMPLEXITIES = {
+    '1': np.ones_like,
+    'log n': np.log,
+    'n': lambda sizes: sizes,
+    'n log n': lambda sizes: sizes * np.log(sizes),
+    'n^2': lambda sizes: sizes**2,
+}
+
+
+def _get_max_rss() -> int:
+    """Gets the peak resident set size of the process so far, in KB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS gives it in bytes
+    return max_rss // 1024 if sys.platform == 'darwin' else max_rss
+
+
+def _run_test(tool_config: tool.ToolConfig, journal_path: Optional[str],
+              resume: bool, run_samples: List[Dict[str, np.ndarray]],
+              prefix: str) -> Dict[str, Any]:
+    """Runs the test of a study point like a regular test, with its own
+    journal.
+
+    Args:
+        tool_config: Performance tool configuration of the point.
+        journal_path: Path of the journal of the study, if any.
+        resume: Whether to skip the runs already in the journal.
+        run_samples: Raw samples of the study, extended with the samples of
+            the point's runs with keys prefixed by `prefix`.
+        prefix: Prefix of the point, e.g. `size_100`.
+
+    Returns:
+        The tool result of the point.
+    """
+    if journal_path is not None:
+        journal_path = os.path.join(journal_path, prefix)
+    test_runner = runner.TestRunner(tool_config=tool_config,
+                                    journal_path=journal_path,
+                                    resume=resume)
+    with trace.tracer.span('point', point=prefix):
+        tool_result = test_runner.execute()
+    run_samples.extend({
+        f'{prefix}_{key}': value for key, value in samples.items()
+    } for samples in test_runner.run_samples)
+    return tool_result
+
+
+def fit_power_law(sizes: np.ndarray,
+                  values: np.ndarray) -> Optional[Dict[str, float]]:
+    """Fits `value = coefficient * size ** exponent` by least squares on a
+    log-log scale.
+
+    Args:
+        sizes: Dataset sizes.
+        values: Values of a metric at each size.
+
+    Returns:
+        The `coefficient`, `exponent` and coefficient of determination `r2`
+        of the fit, or None if there are fewer than 2 sizes or non-positive
+        values.
+    """
+    if len(sizes) < 2 or np.any(values <= 0):
+        return None
+    x, y = np.log(sizes), np.log(values)
+    exponent, intercept = np.polyfit(x, y, 1)
+    residual = ((y - (intercept + exponent * x))**2).sum()
+    total = ((y - y.mean())**2).sum()
+    return {
+        'coefficient': math.exp(intercept),
+        'exponent': float(exponent),
+        'r2': float(1 - residual / total) if total > 0 else 1.0,
+    }
+
+
+def get_complexity(sizes: np.ndarray, values: np.ndarray) -> str:
+    """Gets the complexity class whose growth function fits a metric best,
+    as `value = c * f(size)` by least squares.
+
+    Args:
+        sizes: Dataset sizes.
+        values: Values of a metric at each size.
+
+    Returns:
+        The name of the complexity class with the lowest error, e.g.
+        `n log n`. Ties go to the slower growing class.
+    """
+    best_name, best_error = '1', math.inf
+    for name, function in _COMPLEXITIES.items():
+        basis = function(sizes)
+        norm = basis.dot(basis)
+        if norm == 0:
+            continue
+        c = basis.dot(values) / norm
+        error = ((c * basis - values)**2).sum()
+        if error < best_error * (1 - 1e-9):
+            best_name, best_error = name, error
+    return best_name
+
+
+class ScalingRunner():
+    """Runs a test on nested prefixes of the train set and fits growth
+    curves to its results.
+
+    Each size is run like a regular test, with its own journal. Results are
+    given by size as `size_{n}_{key}`. For in-process services, they include
+    `client_peak_rss_kb`, the growth of the peak resident set size of the
+    process in KB, which at increasing sizes tracks the memory of the
+    largest local index so far. OpenSearch indexes outside the process, so
+    its memory is given by the server-side `index_size` and
+    `graph_memory_usage` of the test instead. For every fitted metric,
+    `{metric}_exponent` and `{metric}_predicted_{n}` are added, and the fits
+    are detailed under `scaling`.
+
+    Attributes:
+        run_samples: Raw samples of each test run, if `save_samples` is set,
+            keyed as `size_{n}_{key}`.
+
+    Methods:
+        execute: Run the test at each size and fit the growth curves.
+    """
+
+    def __init__(self,
+                 tool_config: tool.ToolConfig,
+                 journal_path: Optional[str] = None,
+                 resume: bool = False):
+        """Initializes the scaling study.
+
+        Args:
+            tool_config: Performance tool configuration, with `scaling` set.
+            journal_path: Path of the journal, which holds one journal per
+                size.
+            resume: Whether to skip the runs already in the journals.
+        """
+        self.tool_config = tool_config
+        self.journal_path = journal_path
+        self.resume = resume
+        self.run_samples: List[Dict[str, np.ndarray]] = []
+
+    def execute(self) -> Dict[str, Any]:
+        """Runs the test at each size and fits the growth curves.
+
+        Returns:
+            A dictionary containing the test results at each size and the
+            fitted growth curves.
+        """
+        scaling = cast(tool.ScalingConfig,
+                       self.tool_config.test_parameters.scaling)
+        # the train set is loaded once and shared by every size
+        train = cast(np.ndarray, self.tool_config.dataset.train[:])
+        sizes = sorted({
+            max(1, round(fraction * len(train)))
+            for fraction in scaling.fractions
+        })
+
+        base_memory = _get_max_rss()
+        size_results: Dict[int, Dict[str, Any]] = {}
+        tool_result: Dict[str, Any] = {}
+        for size in sizes:
+            logging.info(f'Running at size {size} of {len(train)}.')
+            size_config = dataclasses.replace(
+                self.tool_config,
+                dataset=tool.Dataset(train=train[:size],
+                                     test=self.tool_config.dataset.test))
+            tool_result = _run_test(size_config, self.journal_path,
+                                    self.resume, self.run_samples,
+                                    f'size_{size}')
+            size_results[size] = tool_result['results']
+            if self.tool_config.knn_service != 'opensearch':
+                size_results[size]['client_peak_rss_kb'] = \
+                    _get_max_rss() - base_memory
+
+        results: Dict[str, Any] = {}
+        for size, size_result in size_results.items():
+            results.update({
+                f'size_{size}_{key}': value
+                for key, value in size_result.items()
+            })
+
+        fits: Dict[str, Any] = {}
+        for metric in scaling.metrics:
+            metric_sizes = [
+                size for size in sizes if metric in size_results[size]
+            ]
+            if len(metric_sizes) < 2:
+                continue
+            x = np.array(metric_sizes, dtype=np.float64)
+            y = np.array([size_results[size][metric] for size in metric_sizes],
+                         dtype=np.float64)
+            fit: Dict[str, Any] = {'complexity': get_complexity(x, y)}
+            power_law = fit_power_law(x, y)
+            if power_law is not None:
+                fit.update(power_law)
+                results[f'{metric}_exponent'] = power_law['exponent']
+                fit['predictions'] = {}
+                for factor in scaling.predict_factors:
+                    size = round(factor * len(train))
+                    prediction = power_law['coefficient'] * \
+                        size**power_law['exponent']
+                    fit['predictions'][str(size)] = prediction
+                    results[f'{metric}_predicted_{size}'] = prediction
+            fits[metric] = fit
+
+        return {
+            'metadata': tool_result['metadata'],
+            'results': results,
+            'test_parameters': tool_result['test_parameters'],
+            'scaling': {
+                'sizes': sizes,
+                'fits': fits,
+            },
+        }
+
+
+class ThreadScalingRunner():
+    """Runs a test at each thread count and computes the speedup and
+    parallel efficiency of its timings.
+
+    The thread count is set on every `parameters` field of the service
+    config, e.g. `index_thread_qty`. Results are given by thread count as
+    `threads_{n}_{key}`. For every metric, `{metric}_speedup_{n}` is its
+    value at the lowest thread count divided by its value at `n` threads,
+    and `{metric}_efficiency_{n}` is the speedup divided by the increase in
+    threads. These curves are also listed under `thread_scaling`.
+
+    Attributes:
+        run_samples: Raw samples of each test run, if `save_samples` is set,
+            keyed as `threads_{n}_{key}`.
+
+    Methods:
+        execute: Run the test at each thread count and compute the speedup.
+    """
+
+    def __init__(self,
+                 tool_config: tool.ToolConfig,
+                 journal_path: Optional[str] = None,
+                 resume: bool = False):
+        """Initializes the thread scaling study.
+
+        Args:
+            tool_config: Performance tool configuration, with `thread_scaling`
+                set.
+            journal_path: Path of the journal, which holds one journal per
+                thread count.
+            resume: Whether to skip the runs already in the journals.
+
+        Thread counts above the maximum that the service schema allows for
+        a parameter are lowered to that maximum.
+
+        Raises:
+            ConfigurationError: If a parameter is not a field of the service
+                config.
+        """
+        self.tool_config = tool_config
+        self.journal_path = journal_path
+        self.resume = resume
+        self.run_samples: List[Dict[str, np.ndarray]] = []
+
+        thread_scaling = cast(tool.ThreadScalingConfig,
+                              tool_config.test_parameters.thread_scaling)
+        fields = {
+            field.name
+            for field in dataclasses.fields(tool_config.service_config)
+        }
+        for parameter in thread_scaling.parameters:
+            if parameter not in fields:
+                raise base.ConfigurationError(
+                    f'{tool_config.knn_service} has no `{parameter}` to '
+                    'scale.')
+
+        schema = utils.get_parser(tool_config.knn_service).validator.schema
+        max_count = min(
+            (schema[parameter].get('max', math.inf)
+             for parameter in thread_scaling.parameters),
+            default=math.inf)
+        self.thread_counts = sorted(
+            {min(count, max_count) for count in thread_scaling.thread_counts})
+        if self.thread_counts[-1] < thread_scaling.thread_counts[-1]:
+            logging.warning(f'Thread counts above {max_count} are lowered to '
+                            f'{max_count}, the maximum of the service config.')
+
+    def execute(self) -> Dict[str, Any]:
+        """Runs the test at each thread count and computes the speedup.
+
+        Returns:
+            A dictionary containing the test results at each thread count and
+            the speedup and efficiency curves.
+        """
+        thread_scaling = cast(tool.ThreadScalingConfig,
+                              self.tool_config.test_parameters.thread_scaling)
+        thread_counts = self.thread_counts
+
+        thread_results: Dict[int, Dict[str, Any]] = {}
+        tool_result: Dict[str, Any] = {}
+        for thread_count in thread_counts:
+            logging.info(f'Running with {thread_count} threads.')
+            service_config = dataclasses.replace(
+                self.tool_config.service_config,
+                **{
+                    parameter: thread_count
+                    for parameter in thread_scaling.parameters
+                })
+            thread_config = dataclasses.replace(self.tool_config,
+                                                service_config=service_config)
+            tool_result = _run_test(thread_config, self.journal_path,
+                                    self.resume, self.run_samples,
+                                    f'threads_{thread_count}')
+            thread_results[thread_count] = tool_result['results']
+
+        results: Dict[str, Any] = {}
+        for thread_count, thread_result in thread_results.items():
+            results.update({
+                f'threads_{thread_count}_{key}': value
+                for key, value in thread_result.items()
+            })
+
+        speedup: Dict[str, List[float]] = {}
+        efficiency: Dict[str, List[float]] = {}
+        base_count = thread_counts[0]
+        for metric in thread_scaling.metrics:
+            base_value = thread_results[base_count].get(metric, 0)
+            if base_value <= 0 or any(
+                    thread_results[thread_count].get(metric, 0) <= 0
+                    for thread_count in thread_counts):
+                continue
+            speedup[metric] = [
+                base_value / thread_results[thread_count][metric]
+                for thread_count in thread_counts
+            ]
+            efficiency[metric] = [
+                metric_speedup * base_count / thread_count
+                for metric_speedup, thread_count in zip(
+                    speedup[metric], thread_counts)
+            ]
+            for i, thread_count in enumerate(thread_counts):
+                results[f'{metric}_speedup_{thread_count}'] = \
+                    speedup[metric][i]
+                results[f'{metric}_efficiency_{thread_count}'] = \
+                    efficiency[metric][i]
+
+        return {
+            'metadata': tool_result['metadata'],
+            'results': results,
+            'test_parameters': tool_result['test_parameters'],
+            'thread_scaling': {
+                'thread_counts': thread_counts,
+                'speedup': speedup,
+                'efficiency': efficiency,
+            },
+        }
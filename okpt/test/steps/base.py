@@ -16,9 +16,10 @@
 # under the License.
 """Provides base Step interface."""
 
+import time
 from typing import Any, Dict, List
 
-from okpt.test import profile
+from okpt.test import profile, profiler, trace
 
 
 class Step:
@@ -30,6 +31,7 @@ class Step:
 
     Methods:
         execute: Run the step and return a step response with the label and corresponding measures.
+        execute_async: Await the step and return a step response with the label and corresponding measures.
     """
 
     label = 'base_step'
@@ -45,12 +47,45 @@ class Step:
         Returns:
             Dict containing step label and various step measures.
         """
+        if not trace.tracer.enabled and not profiler.profiler.enabled:
+            return self._to_response(self._profiled_action()(*args, **kwargs))
+
+        start_ns = time.perf_counter_ns()
+        with profiler.profiler.profile(self.label):
+            response = self._to_response(self._profiled_action()(*args,
+                                                                 **kwargs))
+        if trace.tracer.enabled:
+            trace.tracer.record(self.label, start_ns, time.perf_counter_ns(),
+                                response)
+        return response
+
+    async def execute_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of `execute`, for steps with a coroutine `_action`.
+
+        Returns:
+            Dict containing step label and various step measures.
+        """
+        if not trace.tracer.enabled and not profiler.profiler.enabled:
+            return self._to_response(await self._profiled_action()(*args,
+                                                                   **kwargs))
+
+        start_ns = time.perf_counter_ns()
+        with profiler.profiler.profile(self.label):
+            response = self._to_response(await self._profiled_action()(
+                *args, **kwargs))
+        if trace.tracer.enabled:
+            trace.tracer.record(self.label, start_ns, time.perf_counter_ns(),
+                                response)
+        return response
+
+    def _profiled_action(self):
+        """Wraps the action with the measure decorators."""
         action = self._action
-        # profile the action with measure decorators
         for measure in self.measures:
             action = getattr(profile, measure)(action)
+        return action
 
-        result = action(*args, **kwargs)
+    def _to_response(self, result) -> Dict[str, Any]:
         if isinstance(result, dict):
             return {'label': self.label, **result}
         return {'label': self.label}
@@ -0,0 +1,92 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides steps for brute force tests.
+
+Brute force search has no index: queries are searched exactly against the
+train vectors held in memory, with `neighbors.exact_knn`.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+from okpt.io.config.parsers import bruteforce as bruteforce_parser
+from okpt.test import neighbors
+from okpt.test.steps import base
+
+
+class QueryIndexStep(base.Step):
+    """See base class."""
+
+    label = 'query_index'
+    measures = ['took']
+
+    def __init__(self, train: np.ndarray, vectors: np.ndarray,
+                 service_config: bruteforce_parser.BruteforceConfig):
+        self.train = train
+        self.vectors = vectors
+        self.service_config = service_config
+
+    def _action(self):
+        """Searches a batch of query vectors exactly against train vectors.
+
+        Returns:
+            Dict of the ids of query results, one row per query.
+        """
+        ids = neighbors.exact_knn(self.train,
+                                  self.vectors,
+                                  self.service_config.k,
+                                  self.service_config.space_type,
+                                  tile_size=self.service_config.tile_size,
+                                  num_threads=self.service_config.thread_qty)
+        return {'ids': ids}
+
+
+def batch_query_index(
+        train: np.ndarray, vectors: np.ndarray,
+        service_config: bruteforce_parser.BruteforceConfig
+) -> List[Dict[str, Any]]:
+    """Runs a group of queries exactly against train vectors.
+
+    Queries are searched in batches of `query_batch_size`. One `query_batch`
+    response is given per batch, and one `query_index` response per query,
+    with the `took` of its batch shared evenly among its queries. The batch
+    already accounts for those, so they are flagged with `exclude_from_test`,
+    to be counted once in the test measures.
+
+    Args:
+        train: Array of train vectors.
+        vectors: Array of vectors to query for.
+        service_config: Brute force config.
+
+    Returns:
+        A list of `query_batch` and `query_index` responses.
+    """
+    batch_size = service_config.query_batch_size
+    results: List[Dict[str, Any]] = []
+    for i in range(0, len(vectors), batch_size):
+        batch_result = QueryIndexStep(train=train,
+                                      vectors=vectors[i:i + batch_size],
+                                      service_config=service_config).execute()
+        num_queries = len(batch_result['ids'])
+        results.append({'label': 'query_batch', 'took': batch_result['took']})
+        results.extend({
+            'label': QueryIndexStep.label,
+            'took': batch_result['took'] / num_queries,
+            'ids': ids,
+            'exclude_from_test': True,
+        } for ids in batch_result['ids'])
+    return results
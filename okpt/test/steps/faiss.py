@@ -0,0 +1,232 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides steps for Faiss tests.
+
+The profiling decorators require the wrapped functions to return an dictionary,
+so the functions in this module may return a blank dictionary in order to be
+profiled.
+
+Vectors are converted to contiguous float32 arrays, and normalized for the
+`cosinesimil` space type, when a step is created, so the conversion is not
+measured.
+"""
+from typing import Any, Dict, List
+
+import faiss
+import h5py
+import numpy as np
+
+from okpt.io.config.parsers import faiss as faiss_parser
+from okpt.test.steps import base
+
+_metrics = {
+    'l2': faiss.METRIC_L2,
+    'innerproduct': faiss.METRIC_INNER_PRODUCT,
+    # cosine similarity is the inner product of normalized vectors
+    'cosinesimil': faiss.METRIC_INNER_PRODUCT,
+}
+
+
+def to_vectors(dataset: h5py.Dataset, space_type: str) -> np.ndarray:
+    """Converts a dataset to vectors that Faiss can index and search.
+
+    Args:
+        dataset: Array of vectors.
+        space_type: Space type of the Faiss index, e.g. `l2`.
+
+    Returns:
+        A contiguous float32 copy of the dataset, normalized for `cosinesimil`.
+    """
+    vectors = np.array(dataset[:], dtype=np.float32, order='C')
+    if space_type == 'cosinesimil':
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def get_index_description(method: faiss_parser.MethodConfig) -> str:
+    """Gets the `index_factory` description of a Faiss method.
+
+    Args:
+        method: Faiss method config.
+
+    Returns:
+        Index description, e.g. `HNSW16,Flat` or `IVF128,PQ8x8`.
+    """
+    parameters = method.parameters
+    if method.name == 'hnsw':
+        coarse = f'HNSW{parameters.m}'
+    else:
+        coarse = f'IVF{parameters.nlist}'
+    encoder = parameters.encoder
+    if encoder.name == 'pq':
+        return (f'{coarse},PQ{encoder.parameters.m}'
+                f'x{encoder.parameters.code_size}')
+    return f'{coarse},Flat'
+
+
+class InitIndexStep(base.Step):
+    """See base class."""
+
+    label = 'init_index'
+    measures = ['took']
+
+    def __init__(self, service_config: faiss_parser.FaissConfig,
+                 dimension: int):
+        self.service_config = service_config
+        self.dimension = dimension
+
+    def _action(self):
+        """Initializes a Faiss index.
+
+        Returns:
+            Dict with the newly created Faiss index.
+        """
+        method = self.service_config.method
+        index = faiss.index_factory(self.dimension,
+                                    get_index_description(method),
+                                    _metrics[method.space_type])
+        if method.name == 'hnsw':
+            faiss.downcast_index(index).hnsw.efConstruction = (
+                method.parameters.ef_construction)
+        return {'index': index}
+
+
+class TrainIndexStep(base.Step):
+    """See base class."""
+
+    label = 'train_index'
+    measures = ['took']
+
+    def __init__(self, index: faiss.Index, vectors: np.ndarray,
+                 index_thread_qty: int):
+        self.index = index
+        self.vectors = vectors
+        self.index_thread_qty = index_thread_qty
+
+    def _action(self):
+        """Trains the quantizers of a Faiss index on vectors."""
+        faiss.omp_set_num_threads(self.index_thread_qty)
+        self.index.train(self.vectors)
+
+
+class BulkIndexStep(base.Step):
+    """See base class."""
+
+    label = 'bulk_add'
+    measures = ['took']
+
+    def __init__(self, index: faiss.Index, vectors: np.ndarray,
+                 index_thread_qty: int):
+        self.index = index
+        self.vectors = vectors
+        self.index_thread_qty = index_thread_qty
+
+    def _action(self):
+        """Bulk indexes vectors into a Faiss index."""
+        faiss.omp_set_num_threads(self.index_thread_qty)
+        self.index.add(self.vectors)
+
+
+class QueryIndexStep(base.Step):
+    """See base class."""
+
+    label = 'query_index'
+    measures = ['took']
+
+    def __init__(self, index: faiss.Index, vectors: np.ndarray, k: int):
+        self.index = index
+        self.vectors = vectors
+        self.k = k
+
+    def _action(self):
+        """Searches a batch of query vectors against a Faiss index.
+
+        Returns:
+            Dict of ids and distances of query results, one row per query.
+        """
+        distances, ids = self.index.search(self.vectors, self.k)
+        return {'ids': ids, 'distances': distances}
+
+
+def get_index_size(index: faiss.Index) -> int:
+    """Gets the size of a serialized Faiss index.
+
+    Args:
+        index: A Faiss index.
+
+    Returns:
+        The size of the serialized index in bytes.
+    """
+    return faiss.serialize_index(index).nbytes
+
+
+def set_query_params(index: faiss.Index,
+                     method: faiss_parser.MethodConfig):
+    """Sets the query time parameters of a Faiss index.
+
+    Args:
+        index: A Faiss index.
+        method: Faiss method config.
+    """
+    parameter_space = faiss.ParameterSpace()
+    if method.name == 'hnsw':
+        parameter_space.set_index_parameter(index, 'efSearch',
+                                            method.parameters.ef_search)
+    else:
+        parameter_space.set_index_parameter(index, 'nprobe',
+                                            method.parameters.nprobes)
+
+
+def batch_query_index(index: faiss.Index, vectors: np.ndarray, k: int,
+                      query_batch_size: int,
+                      query_thread_qty: int) -> List[Dict[str, Any]]:
+    """Runs a group of queries against a Faiss index.
+
+    Faiss parallelizes over the queries of a search, so with a
+    `query_batch_size` of 1 queries run one at a time on one thread. One
+    `query_batch` response is given per search, and one `query_index`
+    response per query, with the `took` of its batch shared evenly among its
+    queries. The batch already accounts for those, so they are flagged with
+    `exclude_from_test`, to be counted once in the test measures.
+
+    Args:
+        index: A Faiss index.
+        vectors: Array of vectors to query for.
+        k: Number of neighbors to search for.
+        query_batch_size: Number of queries per search.
+        query_thread_qty: Number of threads searching a batch.
+
+    Returns:
+        A list of `query_batch` and `query_index` responses.
+    """
+    faiss.omp_set_num_threads(query_thread_qty)
+    results: List[Dict[str, Any]] = []
+    for i in range(0, len(vectors), query_batch_size):
+        batch_result = QueryIndexStep(index=index,
+                                      vectors=vectors[i:i + query_batch_size],
+                                      k=k).execute()
+        num_queries = len(batch_result['ids'])
+        results.append({'label': 'query_batch', 'took': batch_result['took']})
+        results.extend({
+            'label': QueryIndexStep.label,
+            'took': batch_result['took'] / num_queries,
+            'ids': ids,
+            'distances': distances,
+            'exclude_from_test': True,
+        } for ids, distances in zip(batch_result['ids'],
+                                    batch_result['distances']))
+    return results
@@ -20,6 +20,8 @@ The profiling decorators require the wrapped functions to return an dictionary,
 so the functions in this module may return a blank dictionary in order to be
 profiled.
 """
+import os
+import tempfile
 from typing import Any, Dict, List, cast
 
 import h5py
@@ -128,3 +130,20 @@ def batch_query_index(index: nmslib.dist.FloatIndex, dataset: h5py.Dataset,
         QueryIndexStep(index=index, vector=cast(np.ndarray, v), k=k).execute()
         for v in dataset
     ]
+
+
+def get_index_size(index: nmslib.dist.FloatIndex) -> int:
+    """Gets the size of an NMSLIB index, without the indexed vectors, by
+    saving it to a temporary directory.
+
+    Args:
+        index: A created NMSLIB index.
+
+    Returns:
+        The size of the saved index in bytes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        index.saveIndex(os.path.join(directory, 'index'), save_data=False)
+        return sum(
+            os.path.getsize(os.path.join(directory, file_name))
+            for file_name in os.listdir(directory))
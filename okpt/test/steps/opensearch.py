@@ -19,14 +19,27 @@
 Some of the OpenSearch operations return a `took` field in the response body,
 so the profiling decorators aren't needed for some functions.
 """
-from typing import Any, Dict, List, cast
+import asyncio
+import base64
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, cast
 
 import h5py
 import numpy as np
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import AsyncOpenSearch, NotFoundError, OpenSearch
+from okpt.test import connection, sampling
 from okpt.test.steps import base
 
+# positions drawn from a query sampler at a time, per worker
+_SAMPLE_CHUNK_SIZE = 100
+
 
 class CreateIndexStep(base.Step):
     """See base class."""
@@ -47,28 +60,96 @@ class CreateIndexStep(base.Step):
             An OpenSearch index creation response body.
         """
         return self.opensearch.indices.create(index=self.index_name,
-                                      body=self.index_spec
+                                              body=self.index_spec)
 
 
-class DisableRefreshStep(base.Step):
+class UpdateSettingsStep(base.Step):
     """See base class."""
 
-    label = 'disable_refresh'
+    label = 'update_settings'
     measures = ['took']
 
-    def __init__(self, opensearch: OpenSearch):
+    def __init__(self, opensearch: OpenSearch, index_name: str,
+                 settings: Dict[str, Any]):
         self.opensearch = opensearch
+        self.index_name = index_name
+        self.settings = settings
 
     def _action(self):
-        """Disables the refresh interval for an OpenSearch index.
+        """Updates the settings of an OpenSearch index. Settings set to None
+        are reset to their default.
 
         Returns:
             An OpenSearch index settings update response body.
         """
-        return self.opensearch.indices.put_settings(
-            body={'index': {
-                'refresh_interval': -1
-            }})
+        return self.opensearch.indices.put_settings(index=self.index_name,
+                                                    body={'index': self.settings})
+
+
+class DisableRefreshStep(UpdateSettingsStep):
+    """See base class. Disables the refresh interval."""
+
+    label = 'disable_refresh'
+
+    def __init__(self, opensearch: OpenSearch, index_name: str):
+        super().__init__(opensearch, index_name, {'refresh_interval': -1})
+
+
+class PrepareIngestStep(UpdateSettingsStep):
+    """See base class. Applies settings for a bulk load."""
+
+    label = 'prepare_ingest'
+
+
+class RestoreSettingsStep(UpdateSettingsStep):
+    """See base class. Restores the settings changed for a bulk load."""
+
+    label = 'restore_settings'
+
+
+class ReplicaRecoveryStep(base.Step):
+    """See base class."""
+
+    label = 'replica_recovery'
+    measures = ['took']
+
+    def __init__(self,
+                 opensearch: OpenSearch,
+                 index_name: str,
+                 num_replicas: int,
+                 timeout: int = 3600):
+        self.opensearch = opensearch
+        self.index_name = index_name
+        self.num_replicas = num_replicas
+        self.timeout = timeout
+
+    def _action(self):
+        """Waits until the replicas of an OpenSearch index that the cluster
+        can assign are recovered.
+
+        A replica is never assigned to the node of its primary, so on a
+        cluster with fewer data nodes than copies of a shard, e.g. a single
+        node, only as many replicas as there are other data nodes are waited
+        for.
+
+        Raises:
+            RuntimeError: If the replicas do not recover within the timeout.
+        """
+        health = self.opensearch.cluster.health(index=self.index_name)
+        num_replicas = min(self.num_replicas,
+                           health['number_of_data_nodes'] - 1)
+        if num_replicas <= 0:
+            return
+        health = self.opensearch.cluster.health(
+            index=self.index_name,
+            wait_for_active_shards=health['active_primary_shards'] *
+            (1 + num_replicas),
+            wait_for_no_initializing_shards=True,
+            timeout=f'{self.timeout}s',
+            request_timeout=self.timeout + 60)
+        if health['timed_out']:
+            raise RuntimeError(f'Replicas of `{self.index_name}` did not '
+                               f'recover within {self.timeout}s.')
 
 
 class BulkStep(base.Step):
@@ -88,7 +169,20 @@ class BulkStep(base.Step):
         Returns:
             An OpenSearch bulk response body.
         """
-        return self.opensearch.bulk(index=self.index_name, body=self.body)
+        response = self.opensearch.bulk(index=self.index_name, body=self.body)
+        return {**response, 'host': connection.get_last_host()}
+
+class BulkDeleteStep(BulkStep):
+    """See base class."""
+
+    label = 'bulk_delete'
+
+
+class BulkUpdateStep(BulkStep):
+    """See base class."""
+
+    label = 'bulk_update'
+
 
 class RefreshIndexStep(base.Step):
     """See base class."""
@@ -106,7 +200,7 @@ class QueryIndexStep(base.Step):
     """See base class."""
 
     label = 'query_index'
-    measures = ['took']
+    measures = ['took', 'latency']
 
     def __init__(self, opensearch: OpenSearch, index_name: str,
                  body: Dict[str, Any]):
@@ -118,42 +212,326 @@ class QueryIndexStep(base.Step):
         """Queries a vector against an OpenSearch index.
 
         Returns:
-            An OpenSearch query response body.
+            Dict with the server-side `took` and the ids of the query results.
+        """
+        response = self.opensearch.search(index=self.index_name, body=self.body)
+        return _parse_search_response(response)
+
+
+class AsyncQueryIndexStep(QueryIndexStep):
+    """See base class. Awaited with `execute_async`."""
+
+    def __init__(self, opensearch: AsyncOpenSearch, index_name: str,
+                 body: Dict[str, Any]):
+        super().__init__(opensearch, index_name, body)
+
+    async def _action(self):
+        """Queries a vector against an OpenSearch index.
+
+        Returns:
+            Dict with the server-side `took` and the ids of the query results.
         """
-        return self.opensearch.search(index=self.index_name, body=self.body)
+        response = await self.opensearch.search(index=self.index_name,
+                                                body=self.body)
+        return _parse_search_response(response)
+
+
+class ProfileQueryStep(QueryIndexStep):
+    """See base class. Queries with `profile: true`, giving the server-side
+    time of each search phase in `PROFILE_PHASES`.
+
+    Profiling slows queries down, so they are not measured as `took` or
+    `latency`, which keeps them out of the test measures and samples.
+    """
+
+    label = 'profile_query'
+    measures: List[str] = []
+
+    def _action(self):
+        """Queries a vector against an OpenSearch index with profiling.
+
+        Returns:
+            Dict with the host that served the query and the time of each
+            search phase.
+        """
+        response = self.opensearch.search(index=self.index_name,
+                                          body={
+                                              **self.body, 'profile': True
+                                          })
+        return {
+            'host': connection.get_last_host(),
+            **_parse_profile(response['profile'])
+        }
+
+
+class MsearchStep(base.Step):
+    """See base class."""
+
+    label = 'msearch'
+    measures = ['took', 'latency']
 
+    def __init__(self, opensearch: OpenSearch, index_name: str, body: str):
+        self.opensearch = opensearch
+        self.index_name = index_name
+        self.body = body
+
+    def _action(self):
+        """Queries a batch of vectors against an OpenSearch index.
+
+        Returns:
+            Dict with the server-side `took` of the batch and the parsed
+            response of each query. A query that failed has its `error`
+            instead of a `took`, and no result ids.
+        """
+        response = self.opensearch.msearch(index=self.index_name,
+                                           body=self.body)
+        return {
+            'took':
+                response['took'],
+            'responses': [
+                _parse_search_response(query_response)
+                if 'error' not in query_response else {
+                    'error': query_response['error'],
+                    'ids': [],
+                    'host': connection.get_last_host(),
+                } for query_response in response['responses']
+            ]
+        }
+
+
+class TrainModelStep(base.Step):
+    """See base class."""
+
+    label = 'train_model'
+    measures = ['took']
+
+    def __init__(self,
+                 opensearch: OpenSearch,
+                 model_id: str,
+                 training_index: str,
+                 dimension: int,
+                 model_spec: Dict[str, Any],
+                 poll_interval: float = 1,
+                 timeout: float = 3600):
+        self.opensearch = opensearch
+        self.model_id = model_id
+        self.training_index = training_index
+        self.dimension = dimension
+        self.model_spec = model_spec
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def _action(self):
+        """Trains a k-NN model on a training index, polling the model until
+        training ends, so that `took` is only accurate to the poll interval.
+
+        Returns:
+            Dict with the size of the trained model in bytes.
 
-def bulk_transform(partition: np.ndarray,
-                   action=Dict[str, Any]) -> List[Dict[str, Any]]:
+        Raises:
+            RuntimeError: If training fails or times out.
+        """
+        body = {
+            **self.model_spec,
+            'training_index': self.training_index,
+            'training_field': 'test_vector',
+            'dimension': self.dimension,
+        }
+        self.opensearch.transport.perform_request(
+            'POST', f'/_plugins/_knn/models/{self.model_id}/_train', body=body)
+
+        deadline = time.perf_counter() + self.timeout
+        while True:
+            model = get_model(self.opensearch, self.model_id)
+            if model['state'] == 'created':
+                break
+            if model['state'] == 'failed':
+                raise RuntimeError(f'Training model `{self.model_id}` failed: '
+                                   f'{model.get("error", "")}')
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f'Training model `{self.model_id}` timed '
+                                   f'out after {self.timeout}s.')
+            time.sleep(self.poll_interval)
+
+        model_blob = model.get('model_blob') or ''
+        return {'model_size': len(base64.b64decode(model_blob))}
+
+
+class DeleteModelStep(base.Step):
+    """See base class."""
+
+    label = 'delete_model'
+    measures = ['took']
+
+    def __init__(self, opensearch: OpenSearch, model_id: str):
+        self.opensearch = opensearch
+        self.model_id = model_id
+
+    def _action(self):
+        """Deletes a k-NN model.
+
+        Returns:
+            A k-NN model deletion response body.
+        """
+        return self.opensearch.transport.perform_request(
+            'DELETE', f'/_plugins/_knn/models/{self.model_id}')
+
+
+class ForceMergeStep(base.Step):
+    """See base class."""
+
+    label = 'force_merge'
+    measures = ['took']
+
+    def __init__(self,
+                 opensearch: OpenSearch,
+                 index_name: str,
+                 max_num_segments: Optional[int] = None,
+                 timeout: float = 3600,
+                 only_expunge_deletes: bool = False):
+        self.opensearch = opensearch
+        self.index_name = index_name
+        self.max_num_segments = max_num_segments
+        self.timeout = timeout
+        self.only_expunge_deletes = only_expunge_deletes
+
+    def _action(self):
+        """Force-merges an OpenSearch index, which also expunges its deleted
+        documents. With `only_expunge_deletes`, only segments holding deleted
+        documents are merged.
+
+        Returns:
+            An OpenSearch force merge response body.
+        """
+        params: Dict[str, Any] = {}
+        if self.max_num_segments is not None:
+            params['max_num_segments'] = self.max_num_segments
+        if self.only_expunge_deletes:
+            params['only_expunge_deletes'] = True
+        return self.opensearch.indices.forcemerge(index=self.index_name,
+                                                  request_timeout=self.timeout,
+                                                  **params)
+
+
+def _parse_search_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps the server-side `took` and the result ids of a search response,
+    along with the host that served it."""
+    return {
+        'took': response['took'],
+        'ids': [int(hit['_id']) for hit in response['hits']['hits']],
+        'host': connection.get_last_host(),
+    }
+
+
+PROFILE_PHASES = [
+    'knn_took', 'query_took', 'rewrite_took', 'collector_took', 'fetch_took'
+]
+
+
+def _get_knn_nanos(nodes: List[Dict[str, Any]]) -> int:
+    """Sums the time of the k-NN queries in a tree of profiled queries,
+    without counting k-NN queries nested in another one twice."""
+    return sum(
+        node['time_in_nanos'] if node['type'].startswith('KNN') else
+        _get_knn_nanos(node.get('children', [])) for node in nodes)
+
+
+def _parse_profile(profile: Dict[str, Any]) -> Dict[str, float]:
+    """Breaks the `profile` of a search response down by search phase.
+
+    The time of a phase, in ms, is summed over the shards:
+
+    - `knn_took`: k-NN queries, i.e. the graph search of the native engines;
+    - `query_took`: all queries, including the k-NN queries;
+    - `rewrite_took`: query rewriting, where the Lucene engine searches its
+      graph;
+    - `collector_took`: collecting the hits;
+    - `fetch_took`: fetching the hits, if the server profiles it.
+    """
+    nanos = dict.fromkeys(PROFILE_PHASES, 0)
+    for shard in profile['shards']:
+        for search in shard['searches']:
+            nanos['knn_took'] += _get_knn_nanos(search['query'])
+            nanos['query_took'] += sum(
+                node['time_in_nanos'] for node in search['query'])
+            nanos['rewrite_took'] += search['rewrite_time']
+            nanos['collector_took'] += sum(
+                collector['time_in_nanos']
+                for collector in search['collector'])
+        nanos['fetch_took'] += shard.get('fetch', {}).get('time_in_nanos', 0)
+    return {phase: value / 1e6 for phase, value in nanos.items()}
+
+
+def _to_list(vectors: np.ndarray) -> List[Any]:
+    """Converts an array of vectors to lists of Python numbers.
+
+    float16 values are converted through their shortest decimal, which rounds
+    to the same float16, so that they are not encoded as e.g. 0.0999755859375
+    instead of 0.1.
+    """
+    if vectors.dtype == np.float16:
+        return vectors.astype(str).astype(np.float64).tolist()
+    return vectors.tolist()
+
+
+def bulk_transform(
+        partition: np.ndarray,
+        index_name: str,
+        offset: int,
+        attributes: Optional[Dict[str, np.ndarray]] = None
+) -> List[Dict[str, Any]]:
     """Partitions and transforms a list of vectors into OpenSearch's bulk injection format.
+
+    Documents are given their position in the dataset as `_id`, so that query
+    results can be matched back to the dataset.
+
     Args:
-        section: An array of vectors to transform.
-        action: Bulk API action.
+        partition: An array of vectors to transform.
+        index_name: Name of the OpenSearch index to ingest vectors into.
+        offset: Position of the first vector of the partition in the dataset.
+        attributes: Arrays of attribute values for the whole dataset, indexed
+            along with the vectors, by attribute name.
     Returns:
         An array of transformed vectors in bulk format.
     """
-    actions = [action, None] * len(partition)
-    actions[1::2] = [{'test_vector': vec} for vec in partition.tolist()]
+    actions: List[Dict[str, Any]] = [{}] * (2 * len(partition))
+    actions[0::2] = [{
+        'index': {
+            '_index': index_name,
+            '_id': doc_id
+        }
+    } for doc_id in range(offset, offset + len(partition))]
+    actions[1::2] = [{'test_vector': vec} for vec in _to_list(partition)]
+    for name, values in (attributes or {}).items():
+        partition_values = values[offset:offset + len(partition)].tolist()
+        for doc, value in zip(actions[1::2], partition_values):
+            doc[name] = value
     return actions
 
 
-def bulk_index(opensearch: OpenSearch, index_name: str,
-               dataset: h5py.Dataset, bulk_size: int):
+def bulk_index(opensearch: OpenSearch,
+               index_name: str,
+               dataset: h5py.Dataset,
+               bulk_size: int,
+               attributes: Optional[Dict[str, np.ndarray]] = None,
+               offset: int = 0):
     """Bulk indexes vectors into an OpenSearch index.
     Args:
         opensearch: An OpenSearch client.
         index_name: Name of the OpenSearch index to ingest vectors into.
         dataset: Dataset of vectors to bulk ingest.
         bulk_size: Number of vectors in one bulk request.
+        attributes: Arrays of attribute values, indexed along with the vectors.
+        offset: Position of the first vector of `dataset` in the whole
+            dataset, for its document id and attribute values.
     Returns:
         An array of bulk injection responses.
     """
     results = []
-    action = {'index': {'_index': index_name}}
     i = 0
-    while i < dataset.len():
+    while i < len(dataset):
         partition = cast(np.ndarray, dataset[i:i + bulk_size])
-        body = bulk_transform(partition, action)
+        body = bulk_transform(partition, index_name, offset + i, attributes)
         result = BulkStep(opensearch=opensearch, index_name=index_name, body=body).execute()
         results.append(result)
         i += bulk_size
@@ -161,35 +539,538 @@ def bulk_index(opensearch: OpenSearch, index_name: str,
     return results
 
 
-def batch_query_index(opensearch: OpenSearch, index_name: str,
-                      dataset: h5py.Dataset, k: int) -> List[Dict[str, Any]]:
-    """Queries an array of vectors against an OpenSearch index.
+def parallel_bulk_index(opensearch: OpenSearch,
+                        index_name: str,
+                        dataset: h5py.Dataset,
+                        bulk_size: int,
+                        num_workers: int,
+                        attributes: Optional[Dict[str, np.ndarray]] = None):
+    """Bulk indexes vectors into an OpenSearch index with `num_workers` bulk
+    requests in flight.
+
+    Each worker thread transforms and sends its own partitions, so that
+    encoding overlaps with the requests of the other workers.
+
+    Args:
+        opensearch: An OpenSearch client, with at least `num_workers`
+            connections per host.
+        index_name: Name of the OpenSearch index to ingest vectors into.
+        dataset: Dataset of vectors to bulk ingest.
+        bulk_size: Number of vectors in one bulk request.
+        num_workers: Number of bulk requests in flight.
+        attributes: Arrays of attribute values, indexed along with the vectors.
+    Returns:
+        An array of bulk injection responses, in dataset order.
+    """
+    if num_workers == 1:
+        return bulk_index(opensearch, index_name, dataset, bulk_size,
+                          attributes)
+
+    def index_partition(offset: int) -> Dict[str, Any]:
+        partition = cast(np.ndarray, dataset[offset:offset + bulk_size])
+        body = bulk_transform(partition, index_name, offset, attributes)
+        return BulkStep(opensearch=opensearch,
+                        index_name=index_name,
+                        body=body).execute()
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(
+            executor.map(index_partition, range(0, len(dataset), bulk_size)))
+
+
+def get_rejected_count(results: List[Dict[str, Any]]) -> int:
+    """Counts the documents of bulk responses rejected with a 429 status,
+    e.g. because the write thread pool queue was full.
+
+    Args:
+        results: Bulk responses.
+
+    Returns:
+        The number of rejected documents.
+    """
+    return sum(1 for result in results if result.get('errors')
+               for item in result.get('items', [])
+               for item_result in item.values()
+               if item_result.get('status') == 429)
+
+
+def rate_limited_bulk_index(opensearch: OpenSearch, index_name: str,
+                            dataset: h5py.Dataset, bulk_size: int, rate: int,
+                            stop: threading.Event,
+                            id_offset: int) -> List[Dict[str, Any]]:
+    """Bulk indexes vectors at a fixed rate until stopped.
+
+    The dataset is cycled through from the start, so document ids repeat after
+    the whole dataset is ingested. Bulk requests that fall behind schedule are
+    sent without waiting.
 
     Args:
         opensearch: An OpenSearch client.
-        index_name: Name of the OpenSearch index to be searched against.
-        dataset: Array of vectors to query.
-        k: Number of neighbors to search for.
+        index_name: Name of the OpenSearch index to ingest vectors into.
+        dataset: Dataset of vectors to bulk ingest.
+        bulk_size: Number of vectors in one bulk request.
+        rate: Number of vectors to ingest per second.
+        stop: Event that stops the ingestion once set.
+        id_offset: Document id of the first vector of the dataset.
     Returns:
-        A list of `query_index` responses.
+        An array of bulk injection responses.
+    """
+    results = []
+    interval = bulk_size / rate
+    next_time = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        partition = cast(np.ndarray, dataset[i:i + bulk_size])
+        body = bulk_transform(partition, index_name, id_offset + i)
+        results.append(
+            BulkStep(opensearch=opensearch, index_name=index_name,
+                     body=body).execute())
+        i = i + bulk_size if i + bulk_size < len(dataset) else 0
+        next_time += interval
+        stop.wait(max(next_time - time.perf_counter(), 0))
+
+    return results
+
+
+def bulk_delete(opensearch: OpenSearch, index_name: str, ids: np.ndarray,
+                bulk_size: int) -> List[Dict[str, Any]]:
+    """Deletes documents from an OpenSearch index by id in bulk.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index to delete documents from.
+        ids: Ids of the documents to delete.
+        bulk_size: Number of deletions in one bulk request.
+    Returns:
+        An array of bulk deletion responses.
+    """
+    results = []
+    for i in range(0, len(ids), bulk_size):
+        body = [{
+            'delete': {
+                '_index': index_name,
+                '_id': doc_id
+            }
+        } for doc_id in ids[i:i + bulk_size].tolist()]
+        results.append(
+            BulkDeleteStep(opensearch=opensearch,
+                           index_name=index_name,
+                           body=body).execute())
+    return results
+
+
+def bulk_update(opensearch: OpenSearch, index_name: str, dataset: np.ndarray,
+                ids: np.ndarray, bulk_size: int) -> List[Dict[str, Any]]:
+    """Updates documents of an OpenSearch index by id in bulk, re-indexing
+    each with the vector at its position in the dataset.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index to update documents of.
+        dataset: Array of vectors, by document id.
+        ids: Ids of the documents to update.
+        bulk_size: Number of updates in one bulk request.
+    Returns:
+        An array of bulk update responses.
     """
-    get_body = lambda vec, k: {
+    results = []
+    for i in range(0, len(ids), bulk_size):
+        partition_ids = ids[i:i + bulk_size]
+        body: List[Dict[str, Any]] = [{}] * (2 * len(partition_ids))
+        body[0::2] = [{
+            'index': {
+                '_index': index_name,
+                '_id': doc_id
+            }
+        } for doc_id in partition_ids.tolist()]
+        body[1::2] = [{
+            'test_vector': vec
+        } for vec in dataset[partition_ids].tolist()]
+        results.append(
+            BulkUpdateStep(opensearch=opensearch,
+                           index_name=index_name,
+                           body=body).execute())
+    return results
+
+
+@dataclass
+class QueryFilter:
+    """A filter clause for k-NN queries.
+
+    Attributes:
+        clause: An OpenSearch query clause, e.g. a `range` query.
+        template: `efficient` to filter inside the k-NN query, or `post` to
+            filter its results with a `post_filter`.
+    """
+    clause: Dict[str, Any]
+    template: str = 'efficient'
+
+
+def _get_query_body(vec: np.ndarray,
+                    k: int,
+                    query_filter: Optional[QueryFilter] = None
+                   ) -> Dict[str, Any]:
+    """Builds the body of a k-NN query, filtered if a filter is given."""
+    knn_query: Dict[str, Any] = {'vector': vec, 'k': k}
+    body: Dict[str, Any] = {
         'size': k,
         'query': {
             'knn': {
-                'test_vector': {
-                    'vector': vec,
-                    'k': k
-                }
+                'test_vector': knn_query
             }
         }
     }
+    if query_filter is not None and query_filter.template == 'efficient':
+        knn_query['filter'] = query_filter.clause
+    elif query_filter is not None:
+        body['post_filter'] = query_filter.clause
+    return body
+
+
+def batch_query_index(
+        opensearch: OpenSearch,
+        index_name: str,
+        dataset: h5py.Dataset,
+        k: int,
+        query_filter: Optional[QueryFilter] = None) -> List[Dict[str, Any]]:
+    """Queries an array of vectors against an OpenSearch index.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index to be searched against.
+        dataset: Array of vectors to query.
+        k: Number of neighbors to search for.
+        query_filter: Filter of the k-NN queries, if any.
+    Returns:
+        A list of `query_index` responses.
+    """
     return [
         QueryIndexStep(opensearch=opensearch, index_name=index_name,
-                       body=get_body(v, k)).execute() for v in dataset
+                       body=_get_query_body(v, k, query_filter)).execute() for v in dataset
     ]
 
 
+def batch_profile_query_index(
+        opensearch: OpenSearch,
+        index_name: str,
+        dataset: np.ndarray,
+        k: int,
+        query_filter: Optional[QueryFilter] = None) -> List[Dict[str, Any]]:
+    """Queries an array of vectors against an OpenSearch index with profiling.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index to be searched against.
+        dataset: Array of vectors to query.
+        k: Number of neighbors to search for.
+        query_filter: Filter of the k-NN queries, if any.
+    Returns:
+        A list of `profile_query` responses.
+    """
+    return [
+        ProfileQueryStep(opensearch=opensearch,
+                         index_name=index_name,
+                         body=_get_query_body(v, k, query_filter)).execute()
+        for v in dataset
+    ]
+
+
+def _get_msearch_body(vectors: np.ndarray,
+                      k: int,
+                      query_filter: Optional[QueryFilter] = None) -> str:
+    """Encodes the k-NN queries of a batch of vectors as an `_msearch` NDJSON
+    body."""
+    lines = []
+    for vec in _to_list(vectors):
+        lines.append('{}')
+        lines.append(json.dumps(_get_query_body(vec, k, query_filter)))
+    return '\n'.join(lines) + '\n'
+
+
+def batch_msearch_index(
+        opensearch: OpenSearch,
+        index_name: str,
+        dataset: h5py.Dataset,
+        k: int,
+        msearch_size: int,
+        query_filter: Optional[QueryFilter] = None) -> List[Dict[str, Any]]:
+    """Queries an array of vectors against an OpenSearch index in `_msearch` batches.
+
+    The request bodies are encoded before any batch is sent, so encoding is
+    not measured. Besides one `msearch` response per batch, one `query_index`
+    response is given per query, with the server-side `took` of the query and
+    the `latency` of its batch, since that is how long the query waited. The
+    batch already accounts for those, so they are flagged with
+    `exclude_from_test`, to be counted once in the test measures.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index to be searched against.
+        dataset: Array of vectors to query.
+        k: Number of neighbors to search for.
+        msearch_size: Number of queries in one `_msearch` request.
+        query_filter: Filter of the k-NN queries, if any.
+    Returns:
+        A list of `msearch` and `query_index` responses.
+    """
+    vectors = cast(np.ndarray, dataset[:])
+    bodies = [
+        _get_msearch_body(vectors[i:i + msearch_size], k,
+                          query_filter)
+        for i in range(0, len(vectors), msearch_size)
+    ]
+
+    results: List[Dict[str, Any]] = []
+    for body in bodies:
+        batch_result = MsearchStep(opensearch=opensearch,
+                                   index_name=index_name,
+                                   body=body).execute()
+        query_results = batch_result.pop('responses')
+        results.append(batch_result)
+        results.extend({
+            'label': QueryIndexStep.label,
+            **query_result,
+            'latency': batch_result['latency'],
+            'exclude_from_test': True,
+        } for query_result in query_results)
+    return results
+
+
+def _sample_positions(sampler: sampling.QuerySampler,
+                      worker: int = 0,
+                      num_workers: int = 1) -> Iterator[int]:
+    """Yields every `num_workers`-th position drawn from a query sampler,
+    starting with the `worker`-th, without end."""
+    while True:
+        yield from sampler.sample(
+            _SAMPLE_CHUNK_SIZE * num_workers)[worker::num_workers].tolist()
+
+
+def async_batch_query_index(
+        client_factory: Callable[[], AsyncOpenSearch],
+        index_name: str,
+        dataset: h5py.Dataset,
+        k: int,
+        concurrency: int,
+        query_filter: Optional[QueryFilter] = None,
+        sampler: Optional[sampling.QuerySampler] = None,
+        duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Queries an array of vectors against an OpenSearch index from one event loop.
+
+    `concurrency` workers share the queue of vectors, so that up to
+    `concurrency` queries are in flight at any time. The latency of a query is
+    the time between its request being sent and its response being received
+    by the event loop.
+
+    Given a sampler and a duration, the workers instead query sampled vectors
+    until the duration is over, with the same loop and client throughout.
+
+    Args:
+        client_factory: Creates an async OpenSearch client. The client is
+            created and closed inside the event loop.
+        index_name: Name of the OpenSearch index to be searched against.
+        dataset: Array of vectors to query.
+        k: Number of neighbors to search for.
+        concurrency: Number of queries in flight.
+        query_filter: Filter of the k-NN queries, if any.
+        sampler: Sampler of the dataset positions to query.
+        duration: Time in seconds to query sampled vectors for.
+    Returns:
+        A list of `query_index` responses, in dataset order. With a sampler,
+        in order of completion instead, with the dataset position of their
+        vector as `query`.
+    """
+    vectors = cast(np.ndarray, dataset[:])
+    results: List[Dict[str, Any]] = [{}] * len(vectors)
+    sampled_results: List[Dict[str, Any]] = []
+
+    async def query_worker(opensearch: AsyncOpenSearch, indices: Iterator[int]):
+        for i in indices:
+            results[i] = await AsyncQueryIndexStep(
+                opensearch=opensearch,
+                index_name=index_name,
+                body=_get_query_body(vectors[i], k, query_filter)).execute_async()
+
+    async def sampled_query_worker(opensearch: AsyncOpenSearch,
+                                   positions: Iterator[int], deadline: float):
+        while time.perf_counter() < deadline:
+            position = next(positions)
+            result = await AsyncQueryIndexStep(
+                opensearch=opensearch,
+                index_name=index_name,
+                body=_get_query_body(vectors[position], k,
+                                     query_filter)).execute_async()
+            sampled_results.append({**result, 'query': position})
+
+    async def run_queries():
+        opensearch = client_factory()
+        try:
+            if sampler is None:
+                # workers share one iterator, so each vector is queried once
+                indices = iter(range(len(vectors)))
+                workers = [
+                    query_worker(opensearch, indices)
+                    for _ in range(concurrency)
+                ]
+            else:
+                positions = _sample_positions(sampler)
+                deadline = time.perf_counter() + cast(float, duration)
+                workers = [
+                    sampled_query_worker(opensearch, positions, deadline)
+                    for _ in range(concurrency)
+                ]
+            await asyncio.gather(*workers)
+        finally:
+            await opensearch.close()
+
+    asyncio.run(run_queries())
+    return results if sampler is None else sampled_results
+
+
+def _process_query_worker(
+        shm_name: str,
+        shape: Tuple[int, ...],
+        dtype: str,
+        worker: int,
+        num_workers: int,
+        client_kwargs: Dict[str, Any],
+        index_name: str,
+        k: int,
+        query_filter: Optional[QueryFilter],
+        sampler: Optional[sampling.QuerySampler] = None,
+        duration: Optional[float] = None) -> Dict[str, Any]:
+    """Queries every `num_workers`-th vector of a shared memory dataset.
+
+    Runs in a worker process, with its own OpenSearch client and timing loop.
+    Given a sampler and a duration, queries every `num_workers`-th sampled
+    position instead, until the duration is over. Every worker gets a copy of
+    the sampler, so together they query the positions it draws.
+
+    Returns:
+        Dict with the dataset positions, `took`, `latency`, result ids and
+        hosts of the worker's queries.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        vectors = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        opensearch = OpenSearch(**client_kwargs)
+        if sampler is None:
+            positions = np.arange(worker, shape[0], num_workers)
+            results = [
+                QueryIndexStep(opensearch=opensearch,
+                               index_name=index_name,
+                               body=_get_query_body(vectors[i], k,
+                                                    query_filter)).execute()
+                for i in positions
+            ]
+        else:
+            sampled_positions = _sample_positions(sampler, worker, num_workers)
+            queried, results = [], []
+            deadline = time.perf_counter() + cast(float, duration)
+            while time.perf_counter() < deadline:
+                i = next(sampled_positions)
+                results.append(
+                    QueryIndexStep(opensearch=opensearch,
+                                   index_name=index_name,
+                                   body=_get_query_body(
+                                       vectors[i], k, query_filter)).execute())
+                queried.append(i)
+            positions = np.array(queried, dtype=np.int64)
+        del vectors
+    finally:
+        shm.close()
+
+    ids = np.full((len(results), k), -1, dtype=np.int64)
+    for row, result in enumerate(results):
+        ids[row, :len(result['ids'])] = result['ids']
+    return {
+        'positions': positions,
+        'took': np.array([result['took'] for result in results]),
+        'latency': np.array([result['latency'] for result in results]),
+        'ids': ids,
+        'hosts': [result['host'] for result in results],
+    }
+
+
+def process_batch_query_index(
+        client_kwargs: Dict[str, Any],
+        index_name: str,
+        dataset: h5py.Dataset,
+        k: int,
+        num_processes: int,
+        query_filter: Optional[QueryFilter] = None,
+        start_method: Optional[str] = None,
+        sampler: Optional[sampling.QuerySampler] = None,
+        duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Queries an array of vectors against an OpenSearch index from a process pool.
+
+    The vectors are copied once into shared memory, which every worker process
+    attaches to instead of receiving a pickled copy. Each worker queries its
+    share of the vectors with its own client and returns its measures as
+    arrays, which are merged back into `query_index` responses.
+
+    Given a sampler and a duration, the workers instead query sampled vectors
+    until the duration is over, with the same pool and clients throughout.
+
+    Forking while other threads run can leave their locks held in the
+    workers, so `spawn` should be used as the start method then.
+
+    Args:
+        client_kwargs: Keyword arguments to create an OpenSearch client with.
+        index_name: Name of the OpenSearch index to be searched against.
+        dataset: Array of vectors to query.
+        k: Number of neighbors to search for.
+        num_processes: Number of worker processes.
+        query_filter: Filter of the k-NN queries, if any.
+        start_method: Start method of the worker processes, e.g. `spawn`;
+            the platform default if not given.
+        sampler: Sampler of the dataset positions to query.
+        duration: Time in seconds to query sampled vectors for.
+    Returns:
+        A list of `query_index` responses, in dataset order. With a sampler,
+        in order of worker instead, with the dataset position of their vector
+        as `query`.
+    """
+    vectors = np.ascontiguousarray(dataset[:])
+    shm = shared_memory.SharedMemory(create=True, size=max(vectors.nbytes, 1))
+    try:
+        np.ndarray(vectors.shape, dtype=vectors.dtype,
+                   buffer=shm.buf)[:] = vectors
+        with ProcessPoolExecutor(
+                max_workers=num_processes,
+                mp_context=multiprocessing.get_context(start_method)
+        ) as executor:
+            futures = [
+                executor.submit(_process_query_worker, shm.name, vectors.shape,
+                                vectors.dtype.str, worker, num_processes,
+                                client_kwargs, index_name, k, query_filter,
+                                sampler, duration)
+                for worker in range(num_processes)
+            ]
+            worker_results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results: List[Dict[str, Any]] = [{}] * len(vectors)
+    sampled_results: List[Dict[str, Any]] = []
+    for worker_result in worker_results:
+        for row, i in enumerate(worker_result['positions'].tolist()):
+            ids = worker_result['ids'][row]
+            result = {
+                'label': QueryIndexStep.label,
+                'took': worker_result['took'][row].item(),
+                'latency': worker_result['latency'][row].item(),
+                'ids': ids[ids >= 0].tolist(),
+                'host': worker_result['hosts'][row],
+            }
+            if sampler is None:
+                results[i] = result
+            else:
+                sampled_results.append({**result, 'query': i})
+    return results if sampler is None else sampled_results
+
+
 def delete_index(opensearch: OpenSearch, index_name: str):
     """Deletes an OpenSearch index.
 
@@ -201,3 +1082,103 @@ def delete_index(opensearch: OpenSearch, index_name: str):
         An OpenSearch index deletion response body.
     """
     opensearch.indices.delete(index=index_name)
+
+
+def get_segment_count(opensearch: OpenSearch, index_name: str) -> int:
+    """Gets the number of primary segments of an OpenSearch index.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index.
+
+    Returns:
+        The number of segments of the primary shards.
+    """
+    stats = opensearch.indices.stats(index=index_name, metric='segments')
+    return stats['_all']['primaries']['segments']['count']
+
+
+def get_store_size(opensearch: OpenSearch, index_name: str) -> int:
+    """Gets the size on disk of the primary shards of an OpenSearch index.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index.
+
+    Returns:
+        The store size of the primary shards in bytes.
+    """
+    stats = opensearch.indices.stats(index=index_name, metric='store')
+    return stats['_all']['primaries']['store']['size_in_bytes']
+
+
+def get_deleted_doc_count(opensearch: OpenSearch, index_name: str) -> int:
+    """Gets the number of deleted documents that the primary segments of an
+    OpenSearch index still hold.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index.
+
+    Returns:
+        The number of deleted documents not yet merged away.
+    """
+    stats = opensearch.indices.stats(index=index_name, metric='docs')
+    return stats['_all']['primaries']['docs']['deleted']
+
+
+def get_graph_memory_usage(opensearch: OpenSearch) -> int:
+    """Gets the memory used by the native k-NN graphs loaded in the cluster.
+
+    Args:
+        opensearch: An OpenSearch client.
+
+    Returns:
+        The graph memory usage summed over the nodes, in KB.
+    """
+    stats = opensearch.transport.perform_request(
+        'GET', '/_plugins/_knn/stats/graph_memory_usage')
+    return sum(node['graph_memory_usage'] for node in stats['nodes'].values())
+
+
+def warmup_index(opensearch: OpenSearch, index_name: str):
+    """Loads the native k-NN graphs of an OpenSearch index into memory.
+
+    Args:
+        opensearch: An OpenSearch client.
+        index_name: Name of the OpenSearch index.
+    """
+    opensearch.transport.perform_request(
+        'GET', f'/_plugins/_knn/warmup/{index_name}')
+
+
+def get_model(opensearch: OpenSearch, model_id: str) -> Dict[str, Any]:
+    """Gets a k-NN model.
+
+    Args:
+        opensearch: An OpenSearch client.
+        model_id: Id of the k-NN model.
+
+    Returns:
+        The k-NN model, with its `state` and, once trained, its base64
+        encoded `model_blob`.
+    """
+    return opensearch.transport.perform_request(
+        'GET', f'/_plugins/_knn/models/{model_id}')
+
+
+def model_exists(opensearch: OpenSearch, model_id: str) -> bool:
+    """Checks whether a k-NN model exists.
+
+    Args:
+        opensearch: An OpenSearch client.
+        model_id: Id of the k-NN model.
+
+    Returns:
+        Whether the k-NN model exists.
+    """
+    try:
+        get_model(opensearch, model_id)
+    except NotFoundError:
+        return False
+    return True
@@ -18,7 +18,10 @@
 from math import floor
 from typing import Any, Dict, List
 
+import numpy as np
+
 from okpt.io.config.parsers import tool
+from okpt.test import neighbors
 
 
 def _pxx(values: List[Any], p: float):
@@ -62,7 +65,8 @@ def _aggregate_steps(steps: List[Dict[str, Any]], measure_labels=['took']):
     `{step_name}_{measure_name}_{percentile|total}`.
 
     Test measures are just step measure sums so they just given as
-    `test_{measure_name}`.
+    `test_{measure_name}`. Steps flagged with `exclude_from_test`, e.g. steps
+    running in the background of the measured ones, only get step measures.
 
     Args:
         steps: List of test steps to be aggregated.
@@ -80,6 +84,7 @@ def _aggregate_steps(steps: List[Dict[str, Any]], measure_labels=['took']):
     # iterate over all test steps
     for step in steps:
         step_label = step['label']
+        in_test = not step.get('exclude_from_test', False)
 
         # iterate over all measures in each test step
         for measure_label in measure_labels:
@@ -89,7 +94,8 @@ def _aggregate_steps(steps: List[Dict[str, Any]], measure_labels=['took']):
                 step_measure = step[measure_label]
                 step_measure_label = f'{step_label}_{measure_label}'
 
-                test_measures[f'test_{measure_label}'] += step_measure
+                if in_test:
+                    test_measures[f'test_{measure_label}'] += step_measure
                 if step_measure_label in step_measures:
                     step_measures[step_measure_label].append(step_measure)
                 else:
@@ -107,15 +113,121 @@ def _aggregate_steps(steps: List[Dict[str, Any]], measure_labels=['took']):
     return aggregate
 
 
+def _aggregate_steps_by(steps: List[Dict[str, Any]],
+                        attribute: str,
+                        measure_labels=['took']) -> Dict[str, Any]:
+    """Aggregates the steps separately for each value of a step attribute.
+
+    Only the step measures are given, as
+    `{step_name}_{attribute_value}_{measure_name}_{percentile|total}`. Steps
+    without the attribute are left out.
+
+    Args:
+        steps: List of test steps to be aggregated.
+        attribute: Step attribute to group the steps by, e.g. `host`.
+        measure_labels: List of step metrics to account for.
+
+    Returns:
+        The step measures of each group.
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for step in steps:
+        if attribute in step:
+            groups.setdefault(step[attribute], []).append({
+                **step, 'label': f'{step["label"]}_{step[attribute]}'
+            })
+
+    aggregate: Dict[str, Any] = {}
+    for group in groups.values():
+        aggregate.update({
+            key: value
+            for key, value in _aggregate_steps(group, measure_labels).items()
+            if not key.startswith('test_')
+        })
+    return aggregate
+
+
+def _pad_ids(rows: List[Any]) -> np.ndarray:
+    """Stacks lists of result ids into a matrix, padding short rows with -1.
+
+    Args:
+        rows: List of result id lists, one per step.
+
+    Returns:
+        A 2D int array with one row per step.
+    """
+    width = max((len(row) for row in rows), default=0)
+    padded = np.full((len(rows), width), -1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        padded[i, :len(row)] = row
+    return padded
+
+
+def _get_recall(steps: List[Dict[str, Any]],
+                ground_truth: np.ndarray,
+                step_label: str = 'query_index') -> float:
+    """Calculates the recall of the result ids of query steps.
+
+    Query steps are matched to ground truth rows by their `query` position if
+    they have one, or else in order.
+
+    Args:
+        steps: List of test steps.
+        ground_truth: Matrix of exact neighbor ids per query.
+        step_label: Label of the query steps.
+
+    Returns:
+        The mean recall of the query steps.
+    """
+    query_steps = [step for step in steps if step['label'] == step_label]
+    if query_steps and 'query' in query_steps[0]:
+        ground_truth = ground_truth[[step['query'] for step in query_steps]]
+    results = _pad_ids([step['ids'] for step in query_steps])
+    return neighbors.recall(results, ground_truth)
+
+
+def _extract_samples(steps: List[Dict[str, Any]],
+                     measure_labels=['took']) -> Dict[str, np.ndarray]:
+    """Extracts the raw per-step samples of a given Test.
+
+    Samples keep the order in which the steps ran and are keyed like the step
+    measures in `_aggregate_steps`, e.g. `query_index_took`. Result ids, if a
+    step returns them, are kept under `{step_name}_ids`.
+
+    Args:
+        steps: List of test steps to extract samples from.
+        measure_labels: List of step metrics to account for.
+
+    Returns:
+        A dict of sample arrays.
+    """
+    samples: Dict[str, List[Any]] = {}
+    for step in steps:
+        for sample_label in [*measure_labels, 'ids']:
+            if sample_label in step:
+                samples.setdefault(f'{step["label"]}_{sample_label}',
+                                   []).append(step[sample_label])
+
+    return {
+        key: _pad_ids(values)
+        if key.endswith('_ids') else np.asarray(values, dtype=np.float64)
+        for key, values in samples.items()
+    }
+
+
 class Test():
     """A base Test class, representing a collection of steps to profiled and aggregated.
 
     Methods:
-        setup: Performs test setup. Usually for steps not intended to be profiled.
+        setup: Performs test setup. Usually for steps not intended to be profiled. When resuming, state left by an interrupted test may be reused.
         run_steps: Runs the test steps, aggregating the results into the `step_results` instance field.
         cleanup: Perform test cleanup. Useful for clearing the state of a persistent process like OpenSearch.
         execute: Runs steps, cleans up, and aggregates the test result.
+        get_samples: Returns the raw samples of the last execution.
     """
+
+    measure_labels: List[str] = ['took']
+
     def __init__(self, service_config, dataset: tool.Dataset):
         """Initializes the test state.
 
@@ -127,7 +239,7 @@ class Test():
         self.dataset = dataset
         self.step_results: List[Dict[str, Any]] = []
 
-    def setup(self):
+    def setup(self, resume: bool = False):
         pass
 
     def _run_steps(self):
@@ -139,4 +251,7 @@ class Test():
     def execute(self):
         self._run_steps()
         self._cleanup()
-        return _aggregate_steps(self.step_results)
+        return _aggregate_steps(self.step_results, self.measure_labels)
+
+    def get_samples(self) -> Dict[str, np.ndarray]:
+        return _extract_samples(self.step_results, self.measure_labels)
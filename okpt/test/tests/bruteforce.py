@@ -0,0 +1,57 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides brute force Test classes."""
+import numpy as np
+
+from okpt.test import neighbors
+from okpt.test.steps import bruteforce
+from okpt.test.tests import base
+
+
+class BruteforceQueryTest(base.Test):
+    """See base class. Test class for exact querying by brute force.
+
+    Setup also stores the ground truth of the dataset in the cache of
+    `neighbors.get_ground_truth`, so that other query tests can score their
+    recall without searching by brute force again.
+    """
+
+    def setup(self, resume: bool = False):
+        """See base class. Loads the vectors and caches the ground truth."""
+        self.train = np.asarray(self.dataset.train[:], dtype=np.float32)
+        self.queries = np.asarray(self.dataset.test[:], dtype=np.float32)
+        self.ground_truth = neighbors.get_ground_truth(
+            self.train,
+            self.queries,
+            self.service_config.k,
+            self.service_config.space_type,
+            tile_size=self.service_config.tile_size,
+            num_threads=self.service_config.thread_qty)
+
+    def _run_steps(self):
+        """See base class. Queries vectors exactly against the train vectors."""
+        self.step_results = bruteforce.batch_query_index(
+            train=self.train,
+            vectors=self.queries,
+            service_config=self.service_config)
+
+    def execute(self):
+        """See base class. Adds the recall, which should always be 1."""
+        result = super().execute()
+        result['query_index_recall'] = base._get_recall(
+            self.step_results, self.ground_truth)
+        return result
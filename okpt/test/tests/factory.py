@@ -14,17 +14,33 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
-"""Provides a factory class for tests."""
+"""Provides a factory class for tests.
+
+Test modules are imported when a test is created, so that only the libraries
+of the backend in use are loaded, and a backend that fails to import does not
+break the others.
+"""
+import importlib
+
 from okpt.io.config.parsers import base as base_p
 from okpt.io.config.parsers import tool
 from okpt.test.tests import base as base_t
-from okpt.test.tests import nmslib, opensearch
 
+# test_id -> (module in `okpt.test.tests`, test class)
 _tests = {
-    'opensearch_index': opensearch.OpenSearchIndexTest,
-    'opensearch_query': opensearch.OpenSearchQueryTest,
-    'nmslib_index': nmslib.NmslibIndexTest,
-    'nmslib_query': nmslib.NmslibQueryTest,
+    'opensearch_index': ('opensearch', 'OpenSearchIndexTest'),
+    'opensearch_model_index': ('opensearch', 'OpenSearchModelIndexTest'),
+    'opensearch_query': ('opensearch', 'OpenSearchQueryTest'),
+    'opensearch_mixed': ('opensearch', 'OpenSearchMixedTest'),
+    'opensearch_filtered_query': ('opensearch', 'OpenSearchFilteredQueryTest'),
+    'opensearch_growth': ('opensearch', 'OpenSearchGrowthTest'),
+    'opensearch_churn': ('opensearch', 'OpenSearchChurnTest'),
+    'opensearch_quantization': ('opensearch', 'OpenSearchQuantizationTest'),
+    'nmslib_index': ('nmslib', 'NmslibIndexTest'),
+    'nmslib_query': ('nmslib', 'NmslibQueryTest'),
+    'faiss_index': ('faiss', 'FaissIndexTest'),
+    'faiss_query': ('faiss', 'FaissQueryTest'),
+    'bruteforce_query': ('bruteforce', 'BruteforceQueryTest'),
 }
 
 
@@ -43,5 +59,7 @@ def TestFactory(tool_config: tool.ToolConfig) -> base_t.Test:
     if not tool_config.test_id in _tests:
         raise base_p.ConfigurationError(message='Invalid test_id.')
 
-    return _tests[tool_config.test_id](tool_config.service_config,
+    module_name, class_name = _tests[tool_config.test_id]
+    module = importlib.import_module(f'okpt.test.tests.{module_name}')
+    return getattr(module, class_name)(tool_config.service_config,
                                        tool_config.dataset)
@@ -0,0 +1,97 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides Faiss Test classes."""
+from typing import Any, Dict, List
+
+from okpt.test import neighbors
+from okpt.test.steps import faiss
+from okpt.test.tests import base
+
+
+class FaissTest(base.Test):
+    """See base class. Base class for Faiss tests, which builds the index."""
+
+    def _build_index(self) -> List[Dict[str, Any]]:
+        """Initializes, trains if needed, and bulk indexes a Faiss index.
+
+        Returns:
+            The step responses of building the index.
+        """
+        method = self.service_config.method
+        train = faiss.to_vectors(self.dataset.train, method.space_type)
+        result = faiss.InitIndexStep(service_config=self.service_config,
+                                     dimension=train.shape[1]).execute()
+        self.index = result['index']
+        step_results = [result]
+        if not self.index.is_trained:
+            step_results.append(
+                faiss.TrainIndexStep(
+                    index=self.index,
+                    vectors=train,
+                    index_thread_qty=self.service_config.index_thread_qty).
+                execute())
+        step_results.append(
+            faiss.BulkIndexStep(
+                index=self.index,
+                vectors=train,
+                index_thread_qty=self.service_config.index_thread_qty).execute(
+                ))
+        return step_results
+
+
+class FaissIndexTest(FaissTest):
+    """See base class. Test class for indexing against Faiss."""
+
+    def _run_steps(self):
+        """See base class. Initializes, trains and bulk indexes an index."""
+        self.step_results = self._build_index()
+
+    def execute(self):
+        """See base class. Adds the size of the index in bytes."""
+        result = super().execute()
+        result['index_size'] = faiss.get_index_size(self.index)
+        return result
+
+
+class FaissQueryTest(FaissTest):
+    """See base class. Test class for querying against Faiss."""
+
+    def setup(self, resume: bool = False):
+        """See base class. Sets up a Faiss index."""
+        self._build_index()
+        faiss.set_query_params(self.index, self.service_config.method)
+        self.queries = faiss.to_vectors(self.dataset.test,
+                                        self.service_config.method.space_type)
+        self.ground_truth = neighbors.get_ground_truth(
+            self.dataset.train[:], self.dataset.test[:], self.service_config.k,
+            self.service_config.method.space_type)
+
+    def _run_steps(self):
+        """See base class. Queries vectors against a Faiss index."""
+        self.step_results = faiss.batch_query_index(
+            index=self.index,
+            vectors=self.queries,
+            k=self.service_config.k,
+            query_batch_size=self.service_config.query_batch_size,
+            query_thread_qty=self.service_config.query_thread_qty)
+
+    def execute(self):
+        """See base class. Adds the recall against the ground truth."""
+        result = super().execute()
+        result['query_index_recall'] = base._get_recall(
+            self.step_results, self.ground_truth)
+        return result
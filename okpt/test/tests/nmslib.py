@@ -15,6 +15,11 @@
 # specific language governing permissions and limitations
 # under the License.
 """Provides NMSLIB Test classes."""
+from typing import cast
+
+import numpy as np
+
+from okpt.test import neighbors
 from okpt.test.steps import nmslib
 from okpt.test.tests import base
 
@@ -34,12 +39,19 @@ class NmslibIndexTest(base.Test):
             nmslib.CreateIndexStep(
                 index=self.index, service_config=self.service_config).execute(),
         ]
+        self.index_size = nmslib.get_index_size(self.index)
+
+    def execute(self):
+        """See base class. Adds the size of the index in bytes."""
+        result = super().execute()
+        result['index_size'] = self.index_size
+        return result
 
 
 class NmslibQueryTest(base.Test):
     """See base class. Test class for querying against NMSLIB."""
 
-    def setup(self):
+    def setup(self, resume: bool = False):
         """See base class. Sets up an NMSLIB index."""
         result = nmslib.InitIndexStep(
             service_config=self.service_config).execute()
@@ -50,6 +62,10 @@ class NmslibQueryTest(base.Test):
                                service_config=self.service_config).execute()
         self.index.setQueryTimeParams(
             {'efSearch': self.service_config.method.parameters.ef_search})
+        self.ground_truth = neighbors.get_ground_truth(
+            cast(np.ndarray, self.dataset.train[:]),
+            cast(np.ndarray, self.dataset.test[:]), self.service_config.k,
+            self.service_config.method.space_type)
 
     def _run_steps(self):
         """See base class. Queries vectors against an NMSLIB index."""
@@ -58,3 +74,10 @@ class NmslibQueryTest(base.Test):
                                       dataset=self.dataset.test,
                                       k=self.service_config.k)
         ]
+
+    def execute(self):
+        """See base class. Adds the recall against the ground truth."""
+        result = super().execute()
+        result['query_index_recall'] = base._get_recall(
+            self.step_results, self.ground_truth)
+        return result
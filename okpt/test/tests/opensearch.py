@@ -15,13 +15,56 @@
 # specific language governing permissions and limitations
 # under the License.
 """Provides OpenSearch Test classes."""
-from elasticsearch import Elasticsearch, RequestsHttpConnection
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import h5py
+import numpy as np
+from opensearchpy import AsyncOpenSearch, OpenSearch, TransportError
 
 from okpt.io.config.parsers import opensearch as opensearch_parser
 from okpt.io.config.parsers import tool
+from okpt.io.config.parsers.base import ConfigurationError
+from okpt.test import connection, neighbors, quantization, sampling
 from okpt.test.steps import opensearch
 from okpt.test.tests import base
 
+_MIN_DURATION_BATCH_SIZE = 100
+_MAX_DURATION_BATCH_SIZE = 10000
+# engines supporting a `filter` inside the k-NN query
+_EFFICIENT_FILTER_ENGINES = ['lucene', 'faiss']
+
+
+def _flatten_settings(settings: Dict[str, Any],
+                      prefix: str = '') -> Dict[str, Any]:
+    """Flattens index settings into dotted keys without the `index.` prefix.
+
+    OpenSearch accepts settings nested or dotted, and with or without the
+    `index.` prefix, so that e.g. `{'index': {'translog':
+    {'flush_threshold_size': '1gb'}}}` and `{'translog.flush_threshold_size':
+    '1gb'}` are the same setting.
+
+    Args:
+        settings: Settings of an index spec.
+        prefix: Dotted key of the settings.
+
+    Returns:
+        A dict of the settings by dotted key.
+    """
+    flat_settings = {}
+    for key, value in settings.items():
+        key = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat_settings.update(_flatten_settings(value, f'{key}.'))
+        elif key.startswith('index.'):
+            flat_settings[key[len('index.'):]] = value
+        else:
+            flat_settings[key] = value
+    return flat_settings
+
 
 class OpenSearchTest(base.Test):
     """See base class. Base OpenSearch Test class."""
@@ -33,22 +76,26 @@ class OpenSearchTest(base.Test):
 
         self.index_name = 'test_index'
 
-        # TODO: fix for security in the future
-        # assume that port is 80 unless localhost is set
-        port = 9200 if service_config.endpoint == "localhost" else 80
-
-        self.es = Elasticsearch(
-            hosts=[{
-                'host': service_config.endpoint,
-                'port': port
-            }],
-            use_ssl=False,
-            verify_certs=False,
-            connection_class=RequestsHttpConnection,
-            timeout=60,
-        )
-
-    def setup(self):
+        self.hosts = [{
+            'host': endpoint.host,
+            'port': endpoint.port
+        } for endpoint in service_config.endpoints]
+
+        self.client_kwargs = {
+            'hosts': self.hosts,
+            'use_ssl': False,
+            'verify_certs': False,
+            'connection_class': connection.TrackedRequestsHttpConnection,
+            'selector_class': connection.selectors[
+                service_config.host_selection],
+            'pool_maxsize': service_config.pool_maxsize,
+            'timeout': 60,
+        }
+        if not service_config.keep_alive:
+            self.client_kwargs['headers'] = {'connection': 'close'}
+        self.es = OpenSearch(**self.client_kwargs)
+
+    def setup(self, resume: bool = False):
         """See base class. Initializes cluster settings and transforms dataset in bulk ingestion format."""
         body = {
             'transient': {
@@ -58,48 +105,1192 @@ class OpenSearchTest(base.Test):
         }
         self.es.cluster.put_settings(body=body)
 
+    def _get_index_spec(self) -> Dict[str, Any]:
+        """Returns the settings and mappings to create the index with."""
+        return self.service_config.index_spec
+
+    def _get_attributes(self) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the attribute values to index along with the train vectors."""
+        return None
+
+    def _get_space_type(self) -> str:
+        """Gets the space type of the k-NN field of the index spec."""
+        return self._get_index_spec().get('mappings', {}).get(
+            'properties', {}).get('test_vector', {}).get('method', {}).get(
+                'space_type', 'l2')
+
     def _cleanup(self):
         """See base class. Deletes the OpenSearch index."""
-        opensearch.delete_index(es=self.es, index_name=self.index_name)
+        opensearch.delete_index(opensearch=self.es, index_name=self.index_name)
+
+    def execute(self):
+        """See base class. Breaks the step measures down by host if there is
+        more than one."""
+        result = super().execute()
+        if len(self.hosts) > 1:
+            result.update(
+                base._aggregate_steps_by(self.step_results, 'host',
+                                         self.measure_labels))
+        return result
 
 
 class OpenSearchIndexTest(OpenSearchTest):
-    """See base class. Test class for indexing against OpenSearch."""
+    """See base class. Test class for indexing against OpenSearch.
+
+    The train set is ingested with `bulk_workers` bulk requests in flight.
+    With `autotune`, setup first ingests a sample into a scratch index at
+    candidate settings: every bulk size with the fewest workers, then every
+    worker count with the fastest bulk size. The runs then ingest with the
+    fastest setting whose rejection rate is within `max_rejection_rate`. The
+    trials are given as `autotune_{bulk_size}_{workers}_docs_per_sec` and
+    `autotune_{bulk_size}_{workers}_rejection_rate`, and the chosen setting
+    as `autotune_bulk_size` and `autotune_workers`.
+
+    With `ingest_optimized`, refresh and replicas are disabled and the
+    translog flush threshold is raised while ingesting. The index spec
+    settings are then restored, the index refreshed and the replicas
+    recovered, each as a separate step. The time from creating the index to
+    it being searchable on every copy is given as `time_to_searchable` in ms.
+    """
+
+    def __init__(self, service_config: opensearch_parser.OpenSearchConfig,
+                 dataset: tool.Dataset):
+        """See base class. Sizes the connection pool for the bulk workers."""
+        super().__init__(service_config, dataset)
+
+        self.bulk_size = service_config.bulk_size
+        self.bulk_workers = service_config.bulk_workers
+        self.autotune_results: Dict[str, Any] = {}
+        num_workers = max([
+            service_config.bulk_workers,
+            *(service_config.autotune.workers
+              if service_config.autotune is not None else [])
+        ])
+        if num_workers > self.client_kwargs['pool_maxsize']:
+            self.client_kwargs['pool_maxsize'] = num_workers
+            self.es = OpenSearch(**self.client_kwargs)
+
+    def setup(self, resume: bool = False):
+        """See base class. Deletes the index left by an interrupted run, and
+        autotunes the ingestion if configured."""
+        super().setup(resume)
+
+        if resume and self.es.indices.exists(index=self.index_name):
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.index_name)
+        if self.service_config.autotune is not None:
+            self._autotune()
+
+    def _run_autotune_trial(self, bulk_size: int,
+                            workers: int) -> Dict[str, float]:
+        """Ingests the autotune sample into an empty scratch index.
+
+        Returns:
+            Dict with the ingested `docs_per_sec` and the `rejection_rate` of
+            the sample.
+        """
+        autotune = cast(opensearch_parser.AutotuneConfig,
+                        self.service_config.autotune)
+        index_name = 'autotune_index'
+        sample = cast(
+            np.ndarray,
+            self.dataset.train[:min(autotune.sample_size,
+                                    len(self.dataset.train))])
+        if self.es.indices.exists(index=index_name):
+            opensearch.delete_index(opensearch=self.es, index_name=index_name)
+        # the model of a model index does not exist yet, so the trials use
+        # the configured index spec
+        opensearch.CreateIndexStep(self.es, index_name,
+                                   self.service_config.index_spec).execute()
+        try:
+            start_time = time.perf_counter()
+            results = opensearch.parallel_bulk_index(self.es, index_name,
+                                                     sample, bulk_size,
+                                                     workers)
+            took = time.perf_counter() - start_time
+        except TransportError as e:
+            if e.status_code != 429:
+                raise
+            return {'docs_per_sec': 0, 'rejection_rate': 1}
+        finally:
+            opensearch.delete_index(opensearch=self.es, index_name=index_name)
+
+        rejected = opensearch.get_rejected_count(results)
+        return {
+            'docs_per_sec': (len(sample) - rejected) / took,
+            'rejection_rate': rejected / len(sample),
+        }
+
+    def _autotune(self):
+        """Picks the bulk size and worker count of the ingestion by trials."""
+        autotune = cast(opensearch_parser.AutotuneConfig,
+                        self.service_config.autotune)
+        trials: Dict[Tuple[int, int], Dict[str, float]] = {}
+
+        def get_score(setting: Tuple[int, int]) -> Tuple[bool, float]:
+            if setting not in trials:
+                trials[setting] = self._run_autotune_trial(*setting)
+                logging.info(f'Autotune trial with bulk size {setting[0]} '
+                             f'and {setting[1]} workers: {trials[setting]}')
+            trial = trials[setting]
+            # settings within the rejection limit beat any other, and
+            # otherwise the one with fewer rejections wins
+            if trial['rejection_rate'] <= autotune.max_rejection_rate:
+                return True, trial['docs_per_sec']
+            return False, -trial['rejection_rate']
+
+        bulk_size = max(autotune.bulk_sizes,
+                        key=lambda size: get_score((size, autotune.workers[0])))
+        workers = max(autotune.workers,
+                      key=lambda count: get_score((bulk_size, count)))
+        logging.info(
+            f'Ingesting with bulk size {bulk_size} and {workers} workers.')
+
+        self.bulk_size, self.bulk_workers = bulk_size, workers
+        self.autotune_results = {
+            'autotune_bulk_size': bulk_size,
+            'autotune_workers': workers,
+        }
+        for (trial_size, trial_workers), trial in trials.items():
+            for key, value in trial.items():
+                self.autotune_results[
+                    f'autotune_{trial_size}_{trial_workers}_{key}'] = value
+
+    def _ingest_optimized(self) -> List[Dict[str, Any]]:
+        """Bulk indexes the train set with the ingest settings, then restores
+        the settings of the index spec.
+
+        Returns:
+            The step responses, up to the replicas being recovered.
+        """
+        ingest_optimized = cast(opensearch_parser.IngestOptimizedConfig,
+                                self.service_config.ingest_optimized)
+        index_settings = _flatten_settings(self._get_index_spec().get(
+            'settings', {}))
+        num_replicas = index_settings.get('number_of_replicas')
+        results = [
+            opensearch.PrepareIngestStep(
+                self.es, self.index_name, {
+                    'refresh_interval':
+                        -1,
+                    'number_of_replicas':
+                        0,
+                    'translog.flush_threshold_size':
+                        ingest_optimized.translog_flush_threshold_size,
+                }).execute(),
+            *opensearch.parallel_bulk_index(self.es, self.index_name,
+                                            self.dataset.train,
+                                            self.bulk_size, self.bulk_workers,
+                                            self._get_attributes()),
+            # settings missing from the spec are reset to their default
+            opensearch.RestoreSettingsStep(
+                self.es, self.index_name, {
+                    'refresh_interval':
+                        index_settings.get('refresh_interval'),
+                    'number_of_replicas':
+                        num_replicas,
+                    'translog.flush_threshold_size':
+                        index_settings.get('translog.flush_threshold_size'),
+                }).execute(),
+            opensearch.RefreshIndexStep(self.es, self.index_name).execute(),
+        ]
+        # the default number of replicas is 1
+        num_restored_replicas = 1 if num_replicas is None else int(
+            num_replicas)
+        if num_restored_replicas > 0:
+            results.append(
+                opensearch.ReplicaRecoveryStep(
+                    self.es, self.index_name, num_restored_replicas,
+                    ingest_optimized.recovery_timeout).execute())
+        return results
 
     def _run_steps(self):
         """See base class. Creates index, bulk indexes vectors, and refreshes the index."""
+        start_time = time.perf_counter()
         self.step_results = [
+            opensearch.CreateIndexStep(self.es, self.index_name,
+                                       self._get_index_spec()).execute()
+        ]
+        if self.service_config.ingest_optimized is not None:
+            self.step_results.extend(self._ingest_optimized())
+        else:
+            self.step_results.extend([
+                *opensearch.parallel_bulk_index(self.es, self.index_name,
+                                                self.dataset.train,
+                                                self.bulk_size,
+                                                self.bulk_workers,
+                                                self._get_attributes()),
+                opensearch.RefreshIndexStep(self.es, self.index_name).execute()
+            ])
+        self.time_to_searchable = (time.perf_counter() - start_time) * 1000
+        self.index_size = opensearch.get_store_size(self.es, self.index_name)
+
+    def execute(self):
+        """See base class. Adds the time to searchable, the store size of the
+        index in bytes, and the autotune trials if any."""
+        result = super().execute()
+        result['time_to_searchable'] = self.time_to_searchable
+        result['index_size'] = self.index_size
+        result.update(self.autotune_results)
+        return result
+
+
+class OpenSearchModelIndexTest(OpenSearchIndexTest):
+    """See base class. Test class for indexing against OpenSearch with a
+    trained k-NN model, e.g. for IVF or PQ methods.
+
+    Each run samples `train.num_vectors` train vectors into a training index,
+    trains a model from `train.model_spec` on it, and indexes the train set
+    into an index whose k-NN field uses the model. The training steps are
+    measured as `train_*`, apart from indexing: they are left out of the
+    `test_*` measures, and their total time is given as `train_took`. The
+    size of the model is given as `train_model_size` in bytes.
+    """
+
+    def __init__(self, service_config: opensearch_parser.OpenSearchConfig,
+                 dataset: tool.Dataset):
+        """See base class."""
+        super().__init__(service_config, dataset)
+        if service_config.train.model_spec is None:
+            raise ConfigurationError(
+                'opensearch_model_index requires train.model_spec.')
+        self.training_index_name = 'train_index'
+        self.model_id = service_config.train.model_id
+
+    def _get_index_spec(self) -> Dict[str, Any]:
+        """See base class. Replaces the k-NN method with the model."""
+        index_spec = super()._get_index_spec()
+        mappings = index_spec.get('mappings', {})
+        return {
+            **index_spec,
+            'mappings': {
+                **mappings,
+                'properties': {
+                    **mappings.get('properties', {}),
+                    'test_vector': {
+                        'type': 'knn_vector',
+                        'model_id': self.model_id
+                    },
+                },
+            },
+        }
+
+    def _get_training_index_spec(self) -> Dict[str, Any]:
+        """Returns the settings and mappings of the training index."""
+        return {
+            'settings': {
+                'index': {
+                    'number_of_shards': 1,
+                    'number_of_replicas': 0
+                }
+            },
+            'mappings': {
+                'properties': {
+                    'test_vector': {
+                        'type': 'knn_vector',
+                        'dimension': self.dataset.train.shape[1]
+                    }
+                }
+            }
+        }
+
+    def setup(self, resume: bool = False):
+        """See base class. Also deletes the model and training index left by
+        an interrupted run."""
+        super().setup(resume)
+
+        if resume and self.es.indices.exists(index=self.training_index_name):
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.training_index_name)
+        if resume and opensearch.model_exists(self.es, self.model_id):
+            opensearch.DeleteModelStep(self.es, self.model_id).execute()
+
+    def _train_model(self) -> List[Dict[str, Any]]:
+        """Ingests sampled train vectors into the training index and trains
+        the model on them.
+
+        Returns:
+            The `train_*` step responses, flagged with `exclude_from_test`.
+        """
+        train_config = self.service_config.train
+        num_vectors = min(train_config.num_vectors, len(self.dataset.train))
+        rng = np.random.default_rng(train_config.seed)
+        positions = np.sort(
+            rng.choice(len(self.dataset.train), num_vectors, replace=False))
+        sample = cast(np.ndarray, self.dataset.train[positions])
+
+        index_results = [
             opensearch.CreateIndexStep(
-                self.es, self.index_name,
-                self.service_config.index_spec).execute(),
-            *opensearch.bulk_index(self.es, self.index_name, self.dataset.train,
+                self.es, self.training_index_name,
+                self._get_training_index_spec()).execute(),
+            *opensearch.bulk_index(self.es, self.training_index_name, sample,
                                    self.service_config.bulk_size),
-            opensearch.RefreshIndexStep(self.es, self.index_name).execute()
+            opensearch.RefreshIndexStep(self.es,
+                                        self.training_index_name).execute(),
+        ]
+        results = [
+            *({
+                **result, 'label': f'train_{result["label"]}'
+            } for result in index_results),
+            opensearch.TrainModelStep(
+                self.es,
+                self.model_id,
+                self.training_index_name,
+                dimension=self.dataset.train.shape[1],
+                model_spec=cast(Dict[str, Any], train_config.model_spec),
+                poll_interval=train_config.poll_interval,
+                timeout=train_config.timeout).execute(),
         ]
+        return [{**result, 'exclude_from_test': True} for result in results]
+
+    def _run_steps(self):
+        """See base class. Trains the model, then indexes with it."""
+        train_results = self._train_model()
+        super()._run_steps()
+        self.step_results = [*train_results, *self.step_results]
+
+    def _cleanup(self):
+        """See base class. Also deletes the model and the training index."""
+        super()._cleanup()
+        opensearch.DeleteModelStep(self.es, self.model_id).execute()
+        opensearch.delete_index(opensearch=self.es,
+                                index_name=self.training_index_name)
+
+    def execute(self):
+        """See base class. Adds the training time and the size of the trained
+        model."""
+        result = super().execute()
+        result['train_took'] = sum(
+            step['took']
+            for step in self.step_results
+            if step.get('exclude_from_test') and 'took' in step)
+        result['train_model_size'] = next(
+            step['model_size']
+            for step in self.step_results
+            if step['label'] == opensearch.TrainModelStep.label)
+        return result
 
 
 class OpenSearchQueryTest(OpenSearchTest):
-    """See base class. Test class for querying against OpenSearch."""
+    """See base class. Test class for querying against OpenSearch.
+
+    Attributes:
+        score_recall: Whether `query_index_recall` is scored against the
+            ground truth of the test set, if the `score_recall` config is set
+            and exact neighbors can be computed for the space type.
+        process_start_method: Start method of the process query driver's
+            workers; the platform default if None.
+        graph_memory_usage: Memory of the native k-NN graphs loaded in the
+            cluster after the queries, in KB, if measured by the test.
+    """
+
+    measure_labels = ['took', 'latency']
+    score_recall = True
+    process_start_method: Optional[str] = None
+    graph_memory_usage: Optional[int] = None
 
-    def setup(self):
-        """See base class. Sets up an OpenSearch index."""
-        super().setup()
+    def setup(self, resume: bool = False):
+        """See base class. Sets up an OpenSearch index, or reuses it when resuming."""
+        super().setup(resume)
+
+        space_type = self._get_space_type()
+        self.score_recall = self.score_recall and \
+            self.service_config.score_recall
+        if self.score_recall and space_type not in neighbors.SPACE_TYPES:
+            logging.warning(f'Recall is not scored, since exact neighbors '
+                            f'are not supported for `{space_type}`.')
+            self.score_recall = False
+        if self.score_recall:
+            self.ground_truth = neighbors.get_ground_truth(
+                cast(np.ndarray, self.dataset.train[:]),
+                cast(np.ndarray, self.dataset.test[:]), self.service_config.k,
+                space_type)
+
+        if resume and self.es.indices.exists(index=self.index_name):
+            # only reuse the index if its ingestion had completed
+            opensearch.RefreshIndexStep(self.es, self.index_name).execute()
+            count = self.es.count(index=self.index_name)['count']
+            if count == len(self.dataset.train):
+                logging.info(f'Reusing existing index `{self.index_name}`.')
+                return
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.index_name)
 
         opensearch.CreateIndexStep(self.es, self.index_name,
-                                   self.service_config.index_spec).execute()
+                                   self._get_index_spec()).execute()
         opensearch.bulk_index(self.es, self.index_name, self.dataset.train,
-                              self.service_config.bulk_size)
+                              self.service_config.bulk_size,
+                              self._get_attributes())
         opensearch.RefreshIndexStep(self.es, self.index_name).execute()
 
+    def _get_async_client(self) -> AsyncOpenSearch:
+        """Creates an async OpenSearch client for the async query driver."""
+        client_kwargs = {
+            **self.client_kwargs,
+            'connection_class': connection.TrackedAIOHttpConnection,
+            'maxsize': max(self.service_config.pool_maxsize,
+                           self.service_config.query_concurrency),
+        }
+        del client_kwargs['pool_maxsize']
+        return AsyncOpenSearch(**client_kwargs)
+
+    def _batch_query(
+            self,
+            dataset: h5py.Dataset,
+            query_filter: Optional[opensearch.QueryFilter] = None,
+            sampler: Optional[sampling.QuerySampler] = None,
+            duration: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Queries vectors with the configured query driver.
+
+        Args:
+            dataset: Array of vectors to query.
+            query_filter: Filter of the k-NN queries, if any.
+            sampler: Sampler of the vectors to query for `duration` seconds,
+                only supported by the async and process query drivers.
+            duration: Time in seconds to query sampled vectors for.
+
+        Returns:
+            A list of `query_index` responses. With a sampler, with the
+            position of their vector as `query`.
+        """
+        if self.service_config.query_driver == 'async':
+            return opensearch.async_batch_query_index(
+                client_factory=self._get_async_client,
+                index_name=self.index_name,
+                dataset=dataset,
+                k=self.service_config.k,
+                concurrency=self.service_config.query_concurrency,
+                query_filter=query_filter,
+                sampler=sampler,
+                duration=duration)
+        if self.service_config.query_driver == 'process':
+            return opensearch.process_batch_query_index(
+                client_kwargs=self.client_kwargs,
+                index_name=self.index_name,
+                dataset=dataset,
+                k=self.service_config.k,
+                num_processes=self.service_config.query_concurrency,
+                query_filter=query_filter,
+                start_method=self.process_start_method,
+                sampler=sampler,
+                duration=duration)
+        if self.service_config.msearch_size > 1:
+            return opensearch.batch_msearch_index(
+                opensearch=self.es,
+                index_name=self.index_name,
+                dataset=dataset,
+                k=self.service_config.k,
+                msearch_size=self.service_config.msearch_size,
+                query_filter=query_filter)
+        return opensearch.batch_query_index(opensearch=self.es,
+                                            index_name=self.index_name,
+                                            dataset=dataset,
+                                            k=self.service_config.k,
+                                            query_filter=query_filter)
+
+    def _batch_query_positions(
+            self,
+            test: np.ndarray,
+            positions: np.ndarray,
+            query_filter: Optional[opensearch.QueryFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """Queries the test vectors at the given positions, giving every
+        `query_index` response the position of its vector as `query`."""
+        results = self._batch_query(test[positions], query_filter)
+        query_positions = iter(positions.tolist())
+        return [{
+            **result, 'query': next(query_positions)
+        } if result['label'] == opensearch.QueryIndexStep.label else result
+                for result in results]
+
+    def _query_test_set(
+        self,
+        query_filter: Optional[opensearch.QueryFilter] = None,
+        test: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """Queries the test set as configured by `query_sampling`.
+
+        In `duration` mode, the async and process query drivers keep their
+        workers and clients for the whole duration. The other drivers send
+        sampled queries in batches, each sized to the remaining time at the
+        query rate so far, so the run overshoots the duration by at most one
+        batch.
+
+        Args:
+            query_filter: Filter of the k-NN queries, if any.
+            test: Vectors to query in place of the test set, e.g. quantized.
+
+        Returns:
+            A list of `query_index` responses, with the position of their
+            vector in the test set as `query`.
+        """
+        if test is None:
+            test = cast(np.ndarray, self.dataset.test[:])
+        query_sampling = self.service_config.query_sampling
+        if query_sampling.mode == 'dataset':
+            return self._batch_query_positions(test, np.arange(len(test)),
+                                               query_filter)
+
+        sampler = sampling.QuerySampler(len(test), query_sampling.replacement,
+                                        query_sampling.seed)
+        if query_sampling.mode == 'count':
+            return self._batch_query_positions(
+                test, sampler.sample(query_sampling.num_queries),
+                query_filter)
+
+        if self.service_config.query_driver in ['async', 'process']:
+            return self._batch_query(test, query_filter, sampler,
+                                     query_sampling.duration)
+
+        results: List[Dict[str, Any]] = []
+        num_queries, batch_size = 0, _MIN_DURATION_BATCH_SIZE
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < query_sampling.duration:
+            results.extend(
+                self._batch_query_positions(test, sampler.sample(batch_size),
+                                            query_filter))
+            num_queries += batch_size
+            elapsed = time.perf_counter() - start_time
+            remaining_queries = num_queries / elapsed * (
+                query_sampling.duration - elapsed)
+            batch_size = int(
+                min(max(remaining_queries, _MIN_DURATION_BATCH_SIZE),
+                    _MAX_DURATION_BATCH_SIZE))
+        return results
+
+    def _profile_queries(
+        self,
+        query_results: List[Dict[str, Any]],
+        query_filter: Optional[opensearch.QueryFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """Queries random test vectors again with profiling, as many as the
+        `query_profile` fraction of the given query results.
+
+        Profiled queries are sent one at a time after the measured queries,
+        so that their overhead does not affect them.
+
+        Args:
+            query_results: Responses of the measured queries.
+            query_filter: Filter of the k-NN queries, if any.
+
+        Returns:
+            A list of `profile_query` responses, with the position of their
+            vector in the test set as `query`.
+        """
+        query_profile = self.service_config.query_profile
+        num_queries = round(query_profile.fraction * sum(
+            1 for result in query_results
+            if result['label'] == opensearch.QueryIndexStep.label))
+        if num_queries == 0:
+            return []
+
+        test = cast(np.ndarray, self.dataset.test[:])
+        positions = sampling.QuerySampler(len(test), False,
+                                          query_profile.seed).sample(num_queries)
+        results = opensearch.batch_profile_query_index(
+            opensearch=self.es,
+            index_name=self.index_name,
+            dataset=test[positions],
+            k=self.service_config.k,
+            query_filter=query_filter)
+        return [{
+            **result, 'query': position
+        } for result, position in zip(results, positions.tolist())]
+
     def _run_steps(self):
         """See base class. Queries vectors against an OpenSearch index."""
-        self.step_results = [
-            *opensearch.batch_query_index(es=self.es,
-                                          index_name=self.index_name,
-                                          dataset=self.dataset.test,
-                                          k=self.service_config.k)
+        start_time = time.perf_counter()
+        self.step_results = self._query_test_set()
+        self.query_window_took = time.perf_counter() - start_time
+        self.step_results.extend(self._profile_queries(self.step_results))
+        self.graph_memory_usage = opensearch.get_graph_memory_usage(self.es)
+
+    def execute(self):
+        """See base class. Adds the query throughput, the number of failed
+        queries if any, the search phase measures of the profiled queries, as
+        `profile_query_{phase}_*`, and the graph memory usage of the cluster
+        after the queries in KB."""
+        result = super().execute()
+        if self.graph_memory_usage is not None:
+            result['graph_memory_usage'] = self.graph_memory_usage
+        query_steps = [
+            step for step in self.step_results
+            if step['label'] == opensearch.QueryIndexStep.label
+        ]
+        result['query_per_sec'] = len(query_steps) / self.query_window_took
+        num_errors = sum(1 for step in query_steps if 'error' in step)
+        if num_errors:
+            logging.warning(f'{num_errors} queries failed.')
+            result['query_index_error_count'] = num_errors
+        profile_steps = [
+            step for step in self.step_results
+            if step['label'] == opensearch.ProfileQueryStep.label
         ]
+        if profile_steps:
+            result.update({
+                key: value for key, value in base._aggregate_steps(
+                    profile_steps, opensearch.PROFILE_PHASES).items()
+                if not key.startswith('test_')
+            })
+        if self.score_recall:
+            result['query_index_recall'] = base._get_recall(
+                self.step_results, self.ground_truth)
+        return result
 
     def _cleanup(self):
         """Override default OpenSearchTest cleanup. Do not delete index between runs."""
         pass
+
+
+class OpenSearchMixedTest(OpenSearchQueryTest):
+    """See base class. Test class for querying against OpenSearch while it
+    ingests vectors.
+
+    Each run queries the test set twice: once on a quiet index, and once while
+    the train set is re-ingested in the background at `ingest_rate` docs/sec
+    as new documents, with the index refreshing every
+    `ingest_refresh_interval`. Query measures are also broken down by window
+    as `query_index_{quiet|ingest}_*`. Only the quiet window is profiled.
+
+    The background `bulk_add` steps are left out of the `test_*` measures, so
+    that those stay comparable with the opensearch_query test. Since the
+    ingestion thread runs while querying, the process query driver spawns
+    its workers instead of forking them.
+    """
+
+    score_recall = False
+    process_start_method = 'spawn'
+
+    def _set_refresh_interval(self, refresh_interval):
+        self.es.indices.put_settings(
+            index=self.index_name,
+            body={'index': {
+                'refresh_interval': refresh_interval
+            }})
+
+    def _run_steps(self):
+        """See base class. Queries vectors on a quiet and an ingesting index."""
+        start_time = time.perf_counter()
+        quiet_results = self._query_test_set()
+        quiet_window_took = time.perf_counter() - start_time
+        quiet_results.extend(self._profile_queries(quiet_results))
+
+        self._set_refresh_interval(
+            self.service_config.ingest_refresh_interval)
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # ingested documents get ids after the ones of the train set
+            ingest_future = executor.submit(opensearch.rate_limited_bulk_index,
+                                            self.es, self.index_name,
+                                            self.dataset.train,
+                                            self.service_config.bulk_size,
+                                            self.service_config.ingest_rate,
+                                            stop, len(self.dataset.train))
+            start_time = time.perf_counter()
+            try:
+                ingest_results = self._query_test_set()
+            finally:
+                stop.set()
+            self.ingest_window_took = time.perf_counter() - start_time
+            self.query_window_took = quiet_window_took + \
+                self.ingest_window_took
+            bulk_results = ingest_future.result()
+
+        self.ingested_docs = sum(len(result['items']) for result in bulk_results)
+        self.step_results = [
+            *[{**result, 'window': 'quiet'} for result in quiet_results],
+            *[{**result, 'window': 'ingest'} for result in ingest_results],
+            *[{**result, 'exclude_from_test': True} for result in bulk_results],
+        ]
+
+    def _cleanup(self):
+        """See base class. Deletes the documents ingested during the run,
+        restores the index refresh interval and expunges the deleted
+        documents, so that their tombstones do not slow down the next run."""
+        num_docs = min(self.ingested_docs, len(self.dataset.train))
+        id_offset = len(self.dataset.train)
+        opensearch.bulk_delete(self.es, self.index_name,
+                               np.arange(id_offset, id_offset + num_docs),
+                               self.service_config.bulk_size)
+        self._set_refresh_interval(
+            self.service_config.index_spec.get('settings', {}).get(
+                'index', {}).get('refresh_interval'))
+        opensearch.RefreshIndexStep(self.es, self.index_name).execute()
+        opensearch.ForceMergeStep(self.es,
+                                  self.index_name,
+                                  only_expunge_deletes=True).execute()
+
+    def execute(self):
+        """See base class. Adds the query measures of each window and the
+        achieved ingestion rate."""
+        result = super().execute()
+        result.update(
+            base._aggregate_steps_by(
+                self.step_results, 'window',
+                self.measure_labels + opensearch.PROFILE_PHASES))
+        result['ingest_docs_per_sec'] = self.ingested_docs / \
+            self.ingest_window_took
+        return result
+
+
+class OpenSearchFilteredQueryTest(OpenSearchQueryTest):
+    """See base class. Test class for filtered querying against OpenSearch.
+
+    Every train vector is indexed with a synthetic `filter_attr` drawn
+    uniformly from [0, 1), so that a `filter_attr < s` filter matches a
+    fraction `s` of the documents. The test set is queried once per
+    configured selectivity `s`, and the results are scored against filtered
+    ground truth computed locally. Measures are broken down by selectivity as
+    `query_index_{s}_*`, along with `query_index_{s}_recall`. The `efficient`
+    filter template requires the Lucene or Faiss engine.
+    """
+
+    score_recall = False
+
+    def __init__(self, service_config: opensearch_parser.OpenSearchConfig,
+                 dataset: tool.Dataset):
+        """See base class. Generates the synthetic attributes."""
+        super().__init__(service_config, dataset)
+
+        rng = np.random.default_rng(service_config.filter.seed)
+        self.filter_attr = rng.random(len(dataset.train), dtype=np.float32)
+
+    def _get_index_spec(self) -> Dict[str, Any]:
+        """See base class. Adds the mapping of the synthetic attribute."""
+        index_spec = super()._get_index_spec()
+        mappings = index_spec.get('mappings', {})
+        return {
+            **index_spec,
+            'mappings': {
+                **mappings,
+                'properties': {
+                    **mappings.get('properties', {}),
+                    'filter_attr': {
+                        'type': 'float'
+                    },
+                },
+            },
+        }
+
+    def _get_attributes(self) -> Optional[Dict[str, np.ndarray]]:
+        """See base class."""
+        return {'filter_attr': self.filter_attr}
+
+    def setup(self, resume: bool = False):
+        """See base class. Also computes the filtered ground truth.
+
+        Raises:
+            ConfigurationError: If the `efficient` filter template is used
+                with an engine that does not support it.
+        """
+        engine = self._get_index_spec().get('mappings', {}).get(
+            'properties', {}).get('test_vector', {}).get('method', {}).get(
+                'engine', 'nmslib')
+        if self.service_config.filter.template == 'efficient' and \
+                engine not in _EFFICIENT_FILTER_ENGINES:
+            raise ConfigurationError(
+                f'The efficient filter template requires the '
+                f'{" or ".join(_EFFICIENT_FILTER_ENGINES)} engine, not '
+                f'{engine}; use the post template instead.')
+
+        super().setup(resume)
+
+        train = cast(np.ndarray, self.dataset.train[:])
+        test = cast(np.ndarray, self.dataset.test[:])
+        space_type = self._get_space_type()
+        self.selectivity_ground_truth: Dict[float, np.ndarray] = {}
+        for selectivity in self.service_config.filter.selectivities:
+            positions = np.flatnonzero(self.filter_attr < selectivity)
+            self.selectivity_ground_truth[selectivity] = positions[
+                neighbors.get_ground_truth(train[positions], test,
+                                           self.service_config.k, space_type)]
+
+    def _run_steps(self):
+        """See base class. Queries vectors once per filter selectivity."""
+        self.query_window_took = 0
+        self.step_results = []
+        for selectivity in self.service_config.filter.selectivities:
+            query_filter = opensearch.QueryFilter(
+                clause={'range': {
+                    'filter_attr': {
+                        'lt': selectivity
+                    }
+                }},
+                template=self.service_config.filter.template)
+            start_time = time.perf_counter()
+            results = self._query_test_set(query_filter)
+            self.query_window_took += time.perf_counter() - start_time
+            results.extend(self._profile_queries(results, query_filter))
+            self.step_results.extend({
+                **result, 'selectivity': selectivity
+            } for result in results)
+
+    def execute(self):
+        """See base class. Adds the measures and recall of each selectivity."""
+        result = super().execute()
+        result.update(
+            base._aggregate_steps_by(
+                self.step_results, 'selectivity',
+                self.measure_labels + opensearch.PROFILE_PHASES))
+        for selectivity, ground_truth in (
+                self.selectivity_ground_truth.items()):
+            result[f'query_index_{selectivity}_recall'] = base._get_recall([
+                step for step in self.step_results
+                if step.get('selectivity') == selectivity
+            ], ground_truth)
+        return result
+
+
+class OpenSearchGrowthTest(OpenSearchQueryTest):
+    """See base class. Test class for querying against OpenSearch as the
+    index grows.
+
+    Each run ingests the train set in `growth.increments` equal increments.
+    After each increment, the index is refreshed and a fixed random sample of
+    `growth.num_queries` test vectors is queried and scored against the
+    ground truth of the ingested vectors. Measures are broken down by index
+    size `n` as `{step_name}_{n}_*`, along with `query_index_{n}_recall`,
+    `index_{n}_segment_count` and `index_{n}_graph_memory_usage` in KB.
+    """
+
+    score_recall = False
+
+    def setup(self, resume: bool = False):
+        """See base class. Samples the queries and computes the ground truth
+        of each index size, but does not build the index, which grows in each
+        run."""
+        OpenSearchTest.setup(self, resume)
+
+        if resume and self.es.indices.exists(index=self.index_name):
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.index_name)
+
+        growth = self.service_config.growth
+        num_vectors = len(self.dataset.train)
+        self.sizes = sorted({
+            -(-num_vectors * i // growth.increments)
+            for i in range(1, growth.increments + 1)
+        })
+        test = cast(np.ndarray, self.dataset.test[:])
+        self.query_positions = np.sort(
+            sampling.QuerySampler(len(test), False, growth.seed).sample(
+                min(growth.num_queries, len(test))))
+
+        train = cast(np.ndarray, self.dataset.train[:])
+        space_type = self._get_space_type()
+        self.size_ground_truth: Dict[int, np.ndarray] = {
+            size: neighbors.get_ground_truth(train[:size],
+                                             test[self.query_positions],
+                                             self.service_config.k,
+                                             space_type)
+            for size in self.sizes
+        }
+
+    def _run_steps(self):
+        """See base class. Grows the index, querying it after each
+        increment."""
+        test = cast(np.ndarray, self.dataset.test[:])
+        self.query_window_took = 0
+        self.index_stats: Dict[int, Dict[str, int]] = {}
+        self.step_results = [
+            opensearch.CreateIndexStep(self.es, self.index_name,
+                                       self._get_index_spec()).execute()
+        ]
+        start = 0
+        for size in self.sizes:
+            results = [
+                *opensearch.bulk_index(self.es,
+                                       self.index_name,
+                                       self.dataset.train[start:size],
+                                       self.service_config.bulk_size,
+                                       self._get_attributes(),
+                                       offset=start),
+                opensearch.RefreshIndexStep(self.es,
+                                            self.index_name).execute(),
+            ]
+            start_time = time.perf_counter()
+            query_results = self._batch_query_positions(
+                test, self.query_positions)
+            self.query_window_took += time.perf_counter() - start_time
+            query_results.extend(self._profile_queries(query_results))
+            self.index_stats[size] = {
+                'segment_count':
+                    opensearch.get_segment_count(self.es, self.index_name),
+                'graph_memory_usage':
+                    opensearch.get_graph_memory_usage(self.es),
+            }
+            self.step_results.extend({
+                **result, 'size': size
+            } for result in [*results, *query_results])
+            start = size
+
+    def _cleanup(self):
+        """See base class. Deletes the grown index."""
+        OpenSearchTest._cleanup(self)
+
+    def execute(self):
+        """See base class. Adds the measures, recall and index stats of each
+        index size."""
+        result = super().execute()
+        result.update(
+            base._aggregate_steps_by(
+                self.step_results, 'size',
+                self.measure_labels + opensearch.PROFILE_PHASES))
+        # the ground truth rows follow the query sample
+        rows = {
+            position: row
+            for row, position in enumerate(self.query_positions.tolist())
+        }
+        for size, ground_truth in self.size_ground_truth.items():
+            query_steps = [{
+                **step, 'query': rows[step['query']]
+            } for step in self.step_results
+                           if step['label'] == opensearch.QueryIndexStep.label
+                           and step.get('size') == size]
+            result[f'query_index_{size}_recall'] = base._get_recall(
+                query_steps, ground_truth)
+            for stat, value in self.index_stats[size].items():
+                result[f'index_{size}_{stat}'] = value
+        return result
+
+
+class OpenSearchChurnTest(OpenSearchQueryTest):
+    """See base class. Test class for querying against OpenSearch before and
+    after updating or deleting documents.
+
+    Each run builds the index, queries it (`before`), then updates or deletes
+    a fixed random `churn.fraction` of the documents by id in bulk, refreshes
+    and queries it again (`after`), and finally force-merges it down to
+    `max_num_segments` and queries it once more (`merged`). Updated documents
+    are re-indexed with the same vector, so that they leave tombstones
+    without changing the ground truth, while deleted documents are left out
+    of the ground truth of the `after` and `merged` queries.
+
+    Query measures are broken down by phase as `query_index_{phase}_*`, along
+    with `query_index_{phase}_recall`, `index_{phase}_segment_count` and
+    `index_{phase}_deleted_doc_count`. The throughput of the updates or
+    deletes is given as `churn_docs_per_sec`.
+    """
+
+    score_recall = False
+
+    def setup(self, resume: bool = False):
+        """See base class. Samples the documents to update or delete and
+        computes the ground truth, but does not build the index, which is
+        rebuilt in each run."""
+        OpenSearchTest.setup(self, resume)
+
+        if resume and self.es.indices.exists(index=self.index_name):
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.index_name)
+
+        churn = self.service_config.churn
+        self.train = cast(np.ndarray, self.dataset.train[:])
+        rng = np.random.default_rng(churn.seed)
+        self.churn_ids = np.sort(
+            rng.choice(len(self.train),
+                       round(churn.fraction * len(self.train)),
+                       replace=False))
+
+        test = cast(np.ndarray, self.dataset.test[:])
+        space_type = self._get_space_type()
+        ground_truth = neighbors.get_ground_truth(self.train, test,
+                                                  self.service_config.k,
+                                                  space_type)
+        churned_ground_truth = ground_truth
+        if churn.operation == 'delete':
+            positions = np.setdiff1d(np.arange(len(self.train)),
+                                     self.churn_ids)
+            churned_ground_truth = positions[neighbors.get_ground_truth(
+                self.train[positions], test, self.service_config.k,
+                space_type)]
+        self.phase_ground_truth = {
+            'before': ground_truth,
+            'after': churned_ground_truth,
+            'merged': churned_ground_truth,
+        }
+
+    def _query_phase(self, phase: str) -> List[Dict[str, Any]]:
+        """Queries the test set and reads the index stats of a phase.
+
+        Returns:
+            The query responses, with the phase as `phase`.
+        """
+        start_time = time.perf_counter()
+        results = self._query_test_set()
+        self.query_window_took += time.perf_counter() - start_time
+        results.extend(self._profile_queries(results))
+        self.index_stats[phase] = {
+            'segment_count':
+                opensearch.get_segment_count(self.es, self.index_name),
+            'deleted_doc_count':
+                opensearch.get_deleted_doc_count(self.es, self.index_name),
+        }
+        return [{**result, 'phase': phase} for result in results]
+
+    def _run_steps(self):
+        """See base class. Builds the index, and queries it before and after
+        the updates or deletes, and after a force merge."""
+        self.query_window_took = 0
+        self.index_stats: Dict[str, Dict[str, int]] = {}
+        self.step_results = [
+            opensearch.CreateIndexStep(self.es, self.index_name,
+                                       self._get_index_spec()).execute(),
+            *opensearch.bulk_index(self.es, self.index_name, self.train,
+                                   self.service_config.bulk_size,
+                                   self._get_attributes()),
+            opensearch.RefreshIndexStep(self.es, self.index_name).execute(),
+        ]
+        self.step_results.extend(self._query_phase('before'))
+
+        start_time = time.perf_counter()
+        if self.service_config.churn.operation == 'delete':
+            self.step_results.extend(
+                opensearch.bulk_delete(self.es, self.index_name,
+                                       self.churn_ids,
+                                       self.service_config.bulk_size))
+        else:
+            self.step_results.extend(
+                opensearch.bulk_update(self.es, self.index_name, self.train,
+                                       self.churn_ids,
+                                       self.service_config.bulk_size))
+        self.churn_window_took = time.perf_counter() - start_time
+        self.step_results.append(
+            opensearch.RefreshIndexStep(self.es, self.index_name).execute())
+        self.step_results.extend(self._query_phase('after'))
+
+        self.step_results.append(
+            opensearch.ForceMergeStep(
+                self.es, self.index_name,
+                self.service_config.max_num_segments).execute())
+        self.step_results.extend(self._query_phase('merged'))
+
+    def _cleanup(self):
+        """See base class. Deletes the index."""
+        OpenSearchTest._cleanup(self)
+
+    def execute(self):
+        """See base class. Adds the measures, recall and index stats of each
+        phase, and the throughput of the updates or deletes."""
+        result = super().execute()
+        result.update(
+            base._aggregate_steps_by(
+                self.step_results, 'phase',
+                self.measure_labels + opensearch.PROFILE_PHASES))
+        for phase, ground_truth in self.phase_ground_truth.items():
+            result[f'query_index_{phase}_recall'] = base._get_recall([
+                step for step in self.step_results
+                if step.get('phase') == phase
+            ], ground_truth)
+            for stat, value in self.index_stats[phase].items():
+                result[f'index_{phase}_{stat}'] = value
+        result['churn_docs_per_sec'] = len(self.churn_ids) / \
+            self.churn_window_took
+        return result
+
+
+class OpenSearchQuantizationTest(OpenSearchQueryTest):
+    """See base class. Test class for comparing full-precision vectors against
+    reduced-precision ones in OpenSearch.
+
+    The train and test sets are quantized once, as set by `quantization`, to
+    `byte` vectors or to `fp16` vectors encoded with the fp16 scalar
+    quantizer of the Faiss engine. Each run builds, warms up and queries an
+    index of the full-precision vectors (`baseline`), then one of the
+    quantized vectors, one after the other so that the graph memory of each
+    is measured alone. Recall of both is scored against the full-precision
+    ground truth.
+
+    Query measures are broken down by variant as `query_index_{variant}_*`,
+    along with `query_index_{variant}_recall`, `index_{variant}_size` in
+    bytes and `index_{variant}_graph_memory_usage` in KB. The Lucene engine
+    keeps no native graphs, so its graph memory usage is 0.
+    """
+
+    score_recall = False
+
+    def setup(self, resume: bool = False):
+        """See base class. Quantizes the dataset and computes the ground
+        truth, but does not build the indices, which are rebuilt in each
+        run."""
+        OpenSearchTest.setup(self, resume)
+
+        if resume and self.es.indices.exists(index=self.index_name):
+            opensearch.delete_index(opensearch=self.es,
+                                    index_name=self.index_name)
+
+        config = self.service_config.quantization
+        train = cast(np.ndarray, self.dataset.train[:])
+        test = cast(np.ndarray, self.dataset.test[:])
+        self.ground_truth = neighbors.get_ground_truth(train, test,
+                                                       self.service_config.k,
+                                                       self._get_space_type())
+
+        scale = config.scale
+        if config.type == 'byte' and scale is None:
+            scale = quantization.get_byte_scale(train)
+        self.quantization_scale = scale
+        self.variants: Dict[str, Tuple[np.ndarray, np.ndarray,
+                                       Dict[str, Any]]] = {
+            'baseline': (train, test, self._get_index_spec()),
+            config.type: (quantization.quantize(train, config.type, scale),
+                          quantization.quantize(test, config.type, scale),
+                          quantization.get_index_spec(self._get_index_spec(),
+                                                      config.type)),
+        }
+
+    def _run_variant(self, variant: str) -> List[Dict[str, Any]]:
+        """Builds, warms up and queries the index of a variant, reads its
+        stats and deletes it.
+
+        Returns:
+            The step results, with the variant as `variant`.
+        """
+        train, test, index_spec = self.variants[variant]
+        results = [
+            opensearch.CreateIndexStep(self.es, self.index_name,
+                                       index_spec).execute(),
+            *opensearch.bulk_index(self.es, self.index_name, train,
+                                   self.service_config.bulk_size),
+            opensearch.RefreshIndexStep(self.es, self.index_name).execute(),
+        ]
+        opensearch.warmup_index(self.es, self.index_name)
+
+        start_time = time.perf_counter()
+        results.extend(self._query_test_set(test=test))
+        self.query_window_took += time.perf_counter() - start_time
+        self.index_stats[variant] = {
+            'size':
+                opensearch.get_store_size(self.es, self.index_name),
+            'graph_memory_usage':
+                opensearch.get_graph_memory_usage(self.es),
+        }
+        opensearch.delete_index(opensearch=self.es, index_name=self.index_name)
+        return [{**result, 'variant': variant} for result in results]
+
+    def _run_steps(self):
+        """See base class. Builds and queries the baseline index, then the
+        quantized one."""
+        self.query_window_took = 0
+        self.index_stats: Dict[str, Dict[str, int]] = {}
+        self.step_results = []
+        for variant in self.variants:
+            self.step_results.extend(self._run_variant(variant))
+
+    def execute(self):
+        """See base class. Adds the measures, recall and index stats of each
+        variant."""
+        result = super().execute()
+        result.update(
+            base._aggregate_steps_by(self.step_results, 'variant',
+                                     self.measure_labels))
+        for variant in self.variants:
+            result[f'query_index_{variant}_recall'] = base._get_recall([
+                step for step in self.step_results
+                if step.get('variant') == variant
+            ], self.ground_truth)
+            for stat, value in self.index_stats[variant].items():
+                result[f'index_{variant}_{stat}'] = value
+        if self.quantization_scale is not None:
+            result['quantization_scale'] = self.quantization_scale
+        return result
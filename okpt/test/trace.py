@@ -0,0 +1,182 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Provides tracing of test steps for timeline analysis.
+
+When tracing is started, every executed step is recorded as a span with its
+start and end time, thread or asyncio task, and scalar response attributes,
+like `took` or `host`. Spans are kept in a bounded ring buffer, so tracing
+long runs only keeps the latest spans, and steps of frequent labels, like
+`query_index`, can be sampled. Traces are written in the Chrome trace-event
+format, which can be loaded in `chrome://tracing` or Perfetto.
+
+Steps run by the process query driver execute in worker processes and are
+not traced.
+
+Attributes:
+    tracer: The tracer used by `Step.execute`.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+_DEFAULT_CAPACITY = 1000000
+# (name, category, start ns, end ns, lane, attributes)
+_Span = Tuple[str, str, int, int, int, Dict[str, Any]]
+
+
+def _get_lane_key() -> Hashable:
+    """Identifies the thread, and the asyncio task if any, running a step."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.get_ident(), id(task) if task is not None else None
+
+
+class Tracer():
+    """Records spans of steps in a ring buffer.
+
+    Attributes:
+        enabled: Whether spans are recorded.
+
+    Methods:
+        start: Start recording spans.
+        stop: Stop recording spans.
+        record: Record a step span.
+        span: Context manager recording a span around a block.
+        write: Write the recorded spans as a Chrome trace.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._spans: Deque[_Span] = deque(maxlen=_DEFAULT_CAPACITY)
+        self._sample_rates: Dict[str, float] = {}
+        self._rng = random.Random(0)
+        self._lanes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+
+    def start(self,
+              capacity: int = _DEFAULT_CAPACITY,
+              sample_rates: Optional[Dict[str, float]] = None,
+              seed: int = 0):
+        """Clears the recorded spans and starts recording.
+
+        Args:
+            capacity: Maximum number of spans kept; older spans are dropped.
+            sample_rates: Fraction of the steps of a label that are recorded,
+                by label; steps of other labels are always recorded.
+            seed: Seed of the sampling.
+        """
+        self._spans = deque(maxlen=capacity)
+        self._sample_rates = sample_rates or {}
+        self._rng = random.Random(seed)
+        self._lanes = {}
+        self._origin_ns = time.perf_counter_ns()
+        self.enabled = True
+
+    def stop(self):
+        """Stops recording, keeping the recorded spans."""
+        self.enabled = False
+
+    def record(self,
+               name: str,
+               start_ns: int,
+               end_ns: int,
+               attributes: Dict[str, Any],
+               category: str = 'step'):
+        """Records a span, unless it is sampled out.
+
+        Args:
+            name: Name of the span, e.g. the step label.
+            start_ns: Start time from `time.perf_counter_ns`.
+            end_ns: End time from `time.perf_counter_ns`.
+            attributes: Attributes of the span; only scalars are kept.
+            category: Category of the span.
+        """
+        sample_rate = self._sample_rates.get(name, 1)
+        if sample_rate < 1 and self._rng.random() >= sample_rate:
+            return
+        lane_key = _get_lane_key()
+        with self._lock:
+            lane = self._lanes.setdefault(lane_key, len(self._lanes))
+        self._spans.append((name, category, start_ns, end_ns, lane, {
+            key: value
+            for key, value in attributes.items()
+            if isinstance(value, (bool, int, float, str)) and key != 'label'
+        }))
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        """Records a span around a block, if tracing is enabled.
+
+        Args:
+            name: Name of the span.
+            attributes: Attributes of the span.
+        """
+        if not self.enabled:
+            yield
+            return
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start_ns, time.perf_counter_ns(), attributes,
+                        'test')
+
+    def write(self, path: str):
+        """Writes the recorded spans as a Chrome trace-event JSON file.
+
+        Every thread or asyncio task that ran steps gets its own track, so
+        concurrent steps do not overlap.
+
+        Args:
+            path: Path of the trace file.
+        """
+        pid = os.getpid()
+        events = [{
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': pid,
+            'tid': lane,
+            'args': {
+                'name': f'thread {lane_key[0]}' if lane_key[1] is None else
+                        f'task {lane_key[1]}'
+            },
+        } for lane_key, lane in self._lanes.items()]
+        events.extend({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - self._origin_ns) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': pid,
+            'tid': lane,
+            'args': attributes,
+        } for name, category, start_ns, end_ns, lane, attributes in list(
+            self._spans))
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+tracer = Tracer()